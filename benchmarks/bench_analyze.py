@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark of price change analysis on a synthetic price history
+
+Builds a price tracking table shaped like the one save_price_tracking produces
+(sorted by item and date) and times InvoiceProcessor.find_price_changes, on the
+table with catalog item ids, against the original per-item loop kept below on the
+table with item names. Both must write the same price_changes.csv
+bytes.
+
+The original loop is O(items x rows), so by default it only runs on the first
+--legacy-rows rows; the speedup is reported on that size and the current engine
+is also timed on the full history.
+
+Usage:
+    python benchmarks/bench_analyze.py                         # 1,000,000 rows
+    python benchmarks/bench_analyze.py --rows 200000 --items 500
+    python benchmarks/bench_analyze.py --legacy-rows 1000000   # Run the original on everything (slow)
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from process_invoices import InvoiceProcessor
+
+
+def legacy_find_price_changes(price_df):
+    """The original analyze_price_changes loop, returning the frame it wrote"""
+    price_changes = []
+    for item_name in price_df['item_name'].unique():
+        item_prices = price_df[price_df['item_name'] == item_name].copy()
+        item_prices = item_prices.sort_values('date')
+        if len(item_prices) > 1:
+            for i in range(1, len(item_prices)):
+                prev_price = item_prices.iloc[i-1]['price_per_item']
+                curr_price = item_prices.iloc[i]['price_per_item']
+                if prev_price != curr_price:
+                    percentage_change = ((curr_price - prev_price) / prev_price) * 100
+                    price_changes.append({
+                        'item_name': item_name,
+                        'previous_date': item_prices.iloc[i-1]['date'].strftime('%m/%d/%Y'),
+                        'current_date': item_prices.iloc[i]['date'].strftime('%m/%d/%Y'),
+                        'previous_price': prev_price,
+                        'current_price': curr_price,
+                        'price_change': curr_price - prev_price,
+                        'percentage_change': round(percentage_change, 2)
+                    })
+    return pd.DataFrame(price_changes)
+
+
+def make_price_history(rows, items, change_probability, seed):
+    """Random-walk prices for `items` items over `rows` observations, sorted like price_tracking.csv"""
+    rng = np.random.default_rng(seed)
+    item_codes = rng.integers(0, items, rows)
+    days = np.sort(rng.integers(0, 3 * 365, rows))
+    steps = np.where(rng.random(rows) < change_probability, rng.uniform(-0.05, 0.05, rows), 0.0)
+
+    df = pd.DataFrame({
+        'date': pd.Timestamp('2023-01-02') + pd.to_timedelta(days, unit='D'),
+        'item_name': np.array([f"ITEM {code:05d} 4 LB" for code in range(items)], dtype=object)[item_codes],
+        'steps': steps,
+        'base': rng.uniform(1, 100, items)[item_codes],
+        'document_number': rng.integers(10000, 99999, rows).astype(str),
+        'document_type': np.where(rng.random(rows) < 0.2, 'receipt', 'invoice'),
+    })
+    df = df.sort_values(['item_name', 'date'], kind='stable')
+    walk = np.exp(np.log1p(df['steps']).groupby(df['item_name'], sort=False).cumsum())
+    df['price_per_item'] = (df['base'] * walk).round(2)
+    return df[['date', 'item_name', 'price_per_item', 'document_number', 'document_type']]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark price change analysis")
+    parser.add_argument("--rows", type=int, default=1000000, help="Price observations (default: 1000000)")
+    parser.add_argument("--items", type=int, default=2000, help="Distinct items (default: 2000)")
+    parser.add_argument("--change-probability", type=float, default=0.2,
+                        help="Chance a price moves between observations (default: 0.2)")
+    parser.add_argument("--legacy-rows", type=int, default=50000,
+                        help="Rows to run the original loop on (default: 50000)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    args = parser.parse_args()
+
+    processor = InvoiceProcessor()
+    history = make_price_history(args.rows, args.items, args.change_probability, args.seed)
+    sample = history.iloc[:min(args.legacy_rows, len(history))]
+    history = processor.with_item_ids(history)
+
+    legacy, legacy_seconds = timed(legacy_find_price_changes, sample)
+    current, current_seconds = timed(processor.find_price_changes, history.iloc[:len(sample)])
+    assert legacy.to_csv(index=False) == current.to_csv(index=False), "outputs differ"
+    print(f"{len(sample):>9} rows   legacy {legacy_seconds:9.3f}s   current {current_seconds:7.3f}s   "
+          f"speedup {legacy_seconds / current_seconds:8.1f}x   ({len(current)} changes, identical CSV)")
+
+    if len(sample) < len(history):
+        current, current_seconds = timed(processor.find_price_changes, history)
+        # The original loop grows with items x rows; scale its sample time to the full history
+        estimate = legacy_seconds * len(history) / len(sample)
+        print(f"{len(history):>9} rows   legacy ~{estimate:8.1f}s (linear estimate)   current {current_seconds:7.3f}s   "
+              f"speedup ~{estimate / current_seconds:7.1f}x   ({len(current)} changes)")
+
+
+if __name__ == "__main__":
+    main()
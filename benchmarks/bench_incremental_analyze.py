@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark of incremental price change analysis
+
+Builds a synthetic price history (as in bench_analyze.py, keeping one
+observation per item and day as deliveries usually are), analyzes it once to
+save price_changes.csv and the price change state, then adds a batch of new
+observations and times extending the saved changes against recomputing and
+rewriting them from the whole history: once with every new observation dated
+after the history (the new changes are appended to the CSV) and once with a few
+backdated (the items concerned are recomputed and the file rewritten). The
+extended changes are checked against the full result as sets of rows, since
+incremental runs append rather than keep the file grouped by item.
+
+Usage:
+    python benchmarks/bench_incremental_analyze.py                  # 1,000,000 observations
+    python benchmarks/bench_incremental_analyze.py --rows 200000 --new 500
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_analyze import make_price_history, timed
+from process_invoices import InvoiceProcessor
+
+
+def make_new_observations(history, count, backdated, seed):
+    """`count` observations of distinct existing items after the history's last day,
+    the first `backdated` of them instead on or up to 30 days before their item's
+    last observation"""
+    rng = np.random.default_rng(seed + 1)
+    item_last = history.groupby('item_name', sort=False)['date'].max()
+    items = rng.choice(item_last.index.to_numpy(), count, replace=False)
+    dates = history['date'].max() + pd.to_timedelta(rng.integers(1, 8, count), unit='D')
+    backdated_dates = item_last[items[:backdated]] - pd.to_timedelta(rng.integers(0, 30, backdated), unit='D')
+    dates = np.concatenate([backdated_dates.to_numpy(), dates[backdated:].to_numpy()])
+    return pd.DataFrame({
+        'date': dates,
+        'item_name': items,
+        'price_per_item': rng.uniform(1, 100, count).round(2),
+        'document_number': rng.integers(10000, 99999, count).astype(str),
+        'document_type': 'invoice',
+    })
+
+
+def canonical_rows(changes_df):
+    return sorted(map(tuple, changes_df.astype(str).values.tolist()))
+
+
+def run_scenario(processor, price_df, new_price_df, backdated):
+    """Time extending the saved changes with new_price_df against analyzing everything again"""
+    combined = pd.concat([price_df, new_price_df], ignore_index=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        processor.analyze_price_changes(price_df)
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        extended, incremental_seconds = timed(processor.analyze_price_changes, combined, new_price_df)
+    assert "Incremental price analysis" in output.getvalue(), "the saved state was not used"
+    recomputed = output.getvalue().split("observations compared, ")[1].split(" items")[0]
+
+    os.remove(processor.price_state_file)
+    with contextlib.redirect_stdout(io.StringIO()):
+        full, full_seconds = timed(processor.analyze_price_changes, combined)
+    assert canonical_rows(extended) == canonical_rows(full), "incremental changes differ from the full analysis"
+    print(f"{len(new_price_df)} new observations, {backdated} backdated ({recomputed} items recomputed):")
+    print(f"  full analysis         {full_seconds:8.3f}s")
+    print(f"  incremental analysis  {incremental_seconds:8.3f}s   "
+          f"speedup {full_seconds / incremental_seconds:6.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark incremental price change analysis")
+    parser.add_argument("--rows", type=int, default=1000000, help="Price observations (default: 1000000)")
+    parser.add_argument("--items", type=int, default=20000, help="Distinct items (default: 20000)")
+    parser.add_argument("--new", type=int, default=1000, help="New observations per run (default: 1000)")
+    parser.add_argument("--backdated", type=int, default=10,
+                        help="New observations dated within the history in the second run (default: 10)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    args = parser.parse_args()
+
+    history = make_price_history(args.rows, args.items, 0.2, args.seed)
+    history = history.drop_duplicates(['item_name', 'date']).reset_index(drop=True)
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.chdir(work_dir)
+        processor = InvoiceProcessor()
+        price_df = processor.with_item_ids(history)
+        print(f"history of {len(price_df)} observations of {args.items} items")
+        for backdated in (0, args.backdated):
+            new = make_new_observations(history, args.new, backdated, args.seed)
+            run_scenario(processor, price_df, processor.with_item_ids(new), backdated)
+        os.chdir(Path(__file__).resolve().parent.parent)
+
+
+if __name__ == "__main__":
+    main()
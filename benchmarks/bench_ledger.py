@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the SQLite price ledger
+
+Stores a synthetic history of parsed documents in a fresh PriceLedger, then times
+single-item history lookups on the (item_key, date) index and full price change
+analysis as a window query, checking the query results against the in-memory
+pipeline (create_price_tracking / find_price_changes). Some line items spell
+their item in lower case or with doubled spaces, which both must treat as the
+same catalog item, and some documents are a second delivery on the same date
+that lists items of the first at a new price, so items have same-day
+observations whose order decides the changes found.
+
+Usage:
+    python benchmarks/bench_ledger.py                      # 1,000,000 line items
+    python benchmarks/bench_ledger.py --lines 200000 --items 500
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from process_invoices import InvoiceDocument, InvoiceProcessor, LineItemColumns, PriceLedger, normalize_item_name
+
+
+def respell(name, rng):
+    """The item name as printed on some documents: lower case or with doubled spaces"""
+    roll = rng.random()
+    if roll < 0.03:
+        return name.lower()
+    if roll < 0.05:
+        return name.replace(' ', '  ')
+    return name
+
+
+def make_documents(lines, items, items_per_document, seed):
+    """Invoices listing distinct items at random-walk prices, mostly one per day
+    
+    One in ten is a second delivery on the previous document's date, repeating
+    ten of its items at changed prices.
+    """
+    rng = random.Random(seed)
+    names = [f"ITEM {code:05d} 4 LB" for code in range(items)]
+    prices = {name: round(rng.uniform(1, 100), 2) for name in names}
+
+    documents = []
+    issued = date(2000, 1, 1)
+    day = 0
+    listed = []
+    for number in range(-(-lines // items_per_document)):
+        if listed and rng.random() < 0.1:
+            repeated = listed[:10]
+            listed = repeated + rng.sample([name for name in names if name not in repeated],
+                                           items_per_document - len(repeated))
+            changed = repeated
+        else:
+            day += 1
+            listed = rng.sample(names, items_per_document)
+            changed = rng.sample(names, 20)
+        for name in changed:
+            prices[name] = max(0.25, round(prices[name] * rng.uniform(0.95, 1.05), 2))
+        documents.append(InvoiceDocument(
+            file_name=f"Invoice_{number:07d}.pdf",
+            invoice_number=str(100000 + number),
+            date=f"{issued + timedelta(days=day):%m/%d/%Y}",
+            items=LineItemColumns((respell(name, rng), 1, prices[name], prices[name]) for name in listed)
+        ))
+    return documents
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the SQLite price ledger")
+    parser.add_argument("--lines", type=int, default=1000000, help="Line items to store (default: 1000000)")
+    parser.add_argument("--items", type=int, default=2000, help="Distinct items (default: 2000)")
+    parser.add_argument("--items-per-document", type=int, default=25,
+                        help="Line items per document (default: 25)")
+    parser.add_argument("--lookups", type=int, default=200, help="Single-item history lookups (default: 200)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    args = parser.parse_args()
+
+    documents = make_documents(args.lines, args.items, args.items_per_document, args.seed)
+    hashes = {document.file_name: f"{index:064x}" for index, document in enumerate(documents)}
+    line_count = sum(len(document.items) for document in documents)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        previous_dir = os.getcwd()
+        os.chdir(work_dir)
+        try:
+            ledger = PriceLedger()
+            start = time.perf_counter()
+            ledger.store(documents, 'invoice', hashes)
+            print(f"store {len(documents)} documents / {line_count} lines: {time.perf_counter() - start:8.2f}s")
+
+            start = time.perf_counter()
+            ledger.store(documents[:100], 'invoice', hashes)
+            print(f"re-store 100 documents (upsert):     {time.perf_counter() - start:8.3f}s")
+
+            rng = random.Random(args.seed)
+            names = [f"ITEM {rng.randrange(args.items):05d} 4 LB" for _ in range(args.lookups)]
+            start = time.perf_counter()
+            rows = sum(len(ledger.item_history(name)) for name in names)
+            elapsed = time.perf_counter() - start
+            print(f"item_history: {elapsed / len(names) * 1000:.2f} ms per item "
+                  f"({rows / len(names):.0f} observations each)")
+
+            processor = InvoiceProcessor()
+            start = time.perf_counter()
+            item_changes = [ledger.price_changes(processor.item_catalog(), name) for name in names]
+            elapsed = time.perf_counter() - start
+            print(f"price_changes for one item:          {elapsed / len(names) * 1000:8.2f} ms")
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                line_items = processor.build_line_items(documents, [])
+                price_df = processor.create_price_tracking(line_items)
+                memory_changes = processor.find_price_changes(price_df)
+                memory_seconds = time.perf_counter() - start
+
+                processor.ledger = ledger
+                ledger_tracking = processor.create_price_tracking(line_items)
+                start = time.perf_counter()
+                ledger_changes = processor.analyze()
+                ledger_seconds = time.perf_counter() - start
+
+            assert ledger_tracking.to_csv(index=False) == price_df.to_csv(index=False)
+            assert ledger_changes.to_csv(index=False) == memory_changes.to_csv(index=False)
+            memory_keys = memory_changes['item_name'].map(normalize_item_name)
+            for name, changes in zip(names, item_changes):
+                assert changes.to_csv(index=False) == \
+                    memory_changes[memory_keys == name].to_csv(index=False), name
+            same_day = price_df.duplicated(['item_id', 'date'], keep=False)
+            print(f"analyze from the ledger, all items:  {ledger_seconds:8.2f}s "
+                  f"(in-memory flatten + track + analyze {memory_seconds:.2f}s; results identical, "
+                  f"{price_df.loc[same_day, 'item_id'].nunique()} items with same-day observations)")
+            ledger.close()
+        finally:
+            os.chdir(previous_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the invoice and receipt text parsers
+
+Runs the parsers in process_invoices.py over synthetic document text and
+compares them against the original implementations kept below, checking that
+both produce the same results.
+
+Usage:
+    python benchmarks/bench_parsers.py                 # Default corpus
+    python benchmarks/bench_parsers.py --docs 5000     # Larger corpus
+    python benchmarks/bench_parsers.py --line-length 20000  # Longer stress lines
+"""
+
+import argparse
+import pickle
+import random
+import re
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from process_invoices import InvoiceProcessor, split_item_line
+
+ITEM_NAMES = [
+    'SWETHA TF SESAME OIL 2LT X 6', 'AMRUTHA ROASTED DALIYA SPLIT 1LB', 'SWETHA TF IDLI RICE 20 LB',
+    'ROYAL BASMATI RICE 20LB', 'VERKA YOGURT BUCKET 32 LBS', 'NANAK FROZEN GULAB JAMUN BUCKET 200 Pcs',
+    'AHOKA KESAR MANGO PULP 6 X 29 OZ (850 GMS) OTS CANS', 'MIF CHILLI POWDER 4 LB',
+    'AMRUTHA CORIANDER POWDER 1 LB', 'VERKA PANEER 4 X 5LB',
+]
+
+
+# Original implementations, kept as the baseline for timing and correctness
+
+def legacy_parse_invoice(text):
+    number_match = re.search(r'INVOICE\s+(\d+)', text)
+    date_match = re.search(r'DATE\s+(\d{2}/\d{2}/\d{4})', text)
+
+    items = []
+    in_items_section = False
+    for line in text.split('\n'):
+        line = line.strip()
+        if 'DESCRIPTION' in line and 'QTY' in line and 'RATE' in line:
+            in_items_section = True
+            continue
+        if 'VERIFIED' in line or 'TOTAL DUE' in line or 'PAYMENT' in line:
+            in_items_section = False
+            continue
+        if not in_items_section or not line:
+            continue
+        item_match = re.match(r'^(.+?)\s+(\d+)\s+([\d.]+)\s+([\d.]+)$', line)
+        if item_match:
+            description = item_match.group(1).strip()
+            skip_terms = ['BILL TO', 'SHIP TO', 'INVOICE']
+            if any(term in description.upper() for term in skip_terms):
+                continue
+            items.append({
+                'description': description,
+                'quantity': int(item_match.group(2)),
+                'rate': float(item_match.group(3)),
+                'amount': float(item_match.group(4))
+            })
+
+    return {
+        'invoice_number': number_match.group(1) if number_match else "",
+        'date': date_match.group(1) if date_match else "",
+        'items': items
+    }
+
+
+def legacy_parse_receipt_items(text):
+    items = []
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        item_match1 = re.match(r'^(.+?)\s+(\d+)\s+([\d.]+)$', line)
+        if item_match1:
+            description = item_match1.group(1).strip()
+            if any(term in description.upper() for term in ['BILL TO', 'SHIP TO', 'INVOICE']):
+                continue
+            quantity = int(item_match1.group(2))
+            amount = float(item_match1.group(3))
+            rate = amount / quantity if quantity > 0 else amount
+            items.append({'description': description, 'quantity': quantity, 'rate': rate, 'amount': amount})
+            continue
+        item_match2 = re.match(r'^(.+?)\s+([\d.]+)$', line)
+        if item_match2 and len(item_match2.group(1)) > 3:
+            description = item_match2.group(1).strip()
+            amount = float(item_match2.group(2))
+            skip_terms = ['TOTAL', 'TAX', 'SUBTOTAL', 'PAYMENT', 'CHANGE', 'CASH', 'CREDIT', 'BILL TO', 'SHIP TO', 'INVOICE']
+            if not any(term in description.upper() for term in skip_terms):
+                items.append({'description': description, 'quantity': 1, 'rate': amount, 'amount': amount})
+    return items
+
+
+LEGACY_ITEM_PATTERNS = {
+    3: r'^(.+?)\s+(\d+)\s+([\d.]+)\s+([\d.]+)$',  # Invoice lines
+    2: r'^(.+?)\s+(\d+)\s+([\d.]+)$',  # Receipt lines with a quantity
+    1: r'^(.+?)\s+([\d.]+)$',  # Receipt lines with only an amount
+}
+
+
+def legacy_parse_receipt_header(text):
+    date = number = ""
+    for pattern in [r'DATE\s+(\d{2}/\d{2}/\d{4})', r'Date:\s*(\d{2}/\d{2}/\d{4})', r'(\d{2}/\d{2}/\d{4})',
+                    r'(\d{1,2}/\d{1,2}/\d{4})', r'(\d{2}-\d{2}-\d{4})']:
+        date_match = re.search(pattern, text)
+        if date_match:
+            date = date_match.group(1)
+            break
+    for pattern in [r'RECEIPT\s+(\d+)', r'Receipt\s*#?\s*(\d+)', r'REF\s*#?\s*(\d+)', r'Reference\s*#?\s*(\d+)']:
+        receipt_match = re.search(pattern, text)
+        if receipt_match:
+            number = receipt_match.group(1)
+            break
+    return date, number
+
+
+# Synthetic corpora
+
+def make_invoice_text(rng, number, items):
+    lines = [
+        "MOTHER INDIA FOODS LLC",
+        "1800 NW 169th Place STE D #",
+        "BEAVERTON, OR 97006",
+        f"BILL TO SHIP TO INVOICE {number}",
+        "CHENNAI MASALA CHENNAI MASALA",
+        f"DATE {rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/2025 TERMS Net 10",
+        "DUE DATE 07/25/2025",
+        "DESCRIPTION QTY RATE AMOUNT",
+    ]
+    total = 0.0
+    for _ in range(items):
+        quantity = rng.randint(1, 50)
+        rate = round(rng.uniform(1, 100), 2)
+        total += quantity * rate
+        lines.append(f"{rng.choice(ITEM_NAMES)} {quantity} {rate:.2f} {quantity * rate:.2f}")
+    lines.append(f"VERIFIED/ EMAILED PAYMENT {total:.2f}")
+    lines.append("TOTAL DUE $0.00")
+    return "\n".join(lines) + "\n"
+
+
+RECEIPT_NUMBER_STYLES = ["RECEIPT {}", "Receipt #{}", "REF #{}", "Reference {}", "Order {}"]
+RECEIPT_DATE_STYLES = ["DATE {m:02d}/{d:02d}/2025", "Date: {m:02d}/{d:02d}/2025", "{m:02d}/{d:02d}/2025",
+                       "{m}/{d}/2025", "{m:02d}-{d:02d}-2025", "Visited in month {m}"]
+
+
+def make_receipt_text(rng, number, items):
+    month, day = rng.randint(1, 12), rng.randint(1, 28)
+    header = [
+        "SPICE BAZAAR",
+        "4500 SW Main St, Portland OR",
+        rng.choice(RECEIPT_NUMBER_STYLES).format(number),
+    ]
+    lines = []
+    for _ in range(items):
+        amount = round(rng.uniform(1, 60), 2)
+        if rng.random() < 0.5:
+            lines.append(f"{rng.choice(ITEM_NAMES)} {rng.randint(1, 5)} {amount:.2f}")
+        else:
+            lines.append(f"{rng.choice(ITEM_NAMES)} {amount:.2f}")
+    footer = [
+        "SUBTOTAL 100.00",
+        "TAX 0.00",
+        "TOTAL 100.00",
+        "CREDIT CARD XXXX1234",
+        rng.choice(RECEIPT_DATE_STYLES).format(m=month, d=day),
+        "Thank you for shopping with us",
+    ]
+    return "\n".join(header + lines + footer) + "\n"
+
+
+def make_long_lines(rng, length):
+    """Item-like lines that the parsers must reject, shaped like OCR noise"""
+    words = ['TERMS', 'AND', 'CONDITIONS', 'NW', 'Stucki', 'Ave,', 'Hillsboro', 'OR', 'USA', '#']
+    noise = []
+    while sum(len(word) + 1 for word in noise) < length:
+        noise.append(rng.choice(words + [str(rng.randint(0, 9999)), f"{rng.uniform(0, 99):.2f}"]))
+    return {
+        'whitespace run': "ITEM 1" + " " * length + "2 x",
+        'numeric noise': " ".join(str(rng.randint(0, 99)) for _ in range(length // 3)) + " TOTAL",
+        'address/terms text': " ".join(noise) + " DUE",
+    }
+
+
+def as_dicts(items):
+    """Line item records as the dicts the legacy parsers return"""
+    return [item._asdict() for item in items]
+
+
+def best_of(repeat, func, docs):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for doc in docs:
+            func(doc)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(name, legacy_seconds, current_seconds, count, unit="doc"):
+    print(f"{name:<32} legacy {legacy_seconds / count * 1e6:11.1f} us/{unit}   "
+          f"current {current_seconds / count * 1e6:9.1f} us/{unit}   "
+          f"speedup {legacy_seconds / current_seconds:5.2f}x")
+
+
+def bench_invoices(processor, rng, args):
+    docs = [make_invoice_text(rng, 27000 + i, args.items) for i in range(args.docs)]
+
+    def current(text):
+        return processor.parse_invoice_lines(text.split('\n'))
+
+    for doc in docs:
+        parsed = current(doc)
+        assert {'invoice_number': parsed.invoice_number, 'date': parsed.date,
+                'items': as_dicts(parsed.items)} == legacy_parse_invoice(doc)
+
+    report("invoice parse", best_of(args.repeat, legacy_parse_invoice, docs),
+           best_of(args.repeat, current, docs), len(docs))
+
+
+def bench_receipt_headers(processor, rng, args):
+    docs = [make_receipt_text(rng, 1000 + i, args.items) for i in range(args.docs)]
+
+    def current(text):
+        return processor.parse_receipt_date(text), processor.parse_receipt_number(text)
+
+    for doc in docs:
+        assert current(doc) == legacy_parse_receipt_header(doc)
+
+    report("receipt date + number", best_of(args.repeat, legacy_parse_receipt_header, docs),
+           best_of(args.repeat, current, docs), len(docs))
+
+
+def bench_receipt_items(processor, rng, args):
+    docs = [make_receipt_text(rng, 1000 + i, args.items) for i in range(args.docs)]
+
+    for doc in docs:
+        assert as_dicts(processor.parse_receipt_items(doc)) == legacy_parse_receipt_items(doc)
+
+    report("receipt items", best_of(args.repeat, legacy_parse_receipt_items, docs),
+           best_of(args.repeat, processor.parse_receipt_items, docs), len(docs))
+
+
+def bench_long_lines(rng, args):
+    """Stress the item-line matchers with long lines, where the lazy regexes backtrack"""
+    for length in (args.line_length // 10, args.line_length):
+        for shape, line in make_long_lines(rng, length).items():
+            for fields, pattern in LEGACY_ITEM_PATTERNS.items():
+                compiled = re.compile(pattern)
+                match = compiled.match(line)
+                expected = [match.group(1).strip()] + list(match.groups()[1:]) if match else None
+                assert split_item_line(line, fields) == expected
+
+            def legacy(lines):
+                return [re.match(pattern, lines) for pattern in LEGACY_ITEM_PATTERNS.values()]
+
+            def current(lines):
+                return [split_item_line(lines, fields) for fields in LEGACY_ITEM_PATTERNS]
+
+            # The legacy regexes are too slow on the longest lines to repeat
+            report(f"{len(line)}-char {shape}", best_of(1, legacy, [line]),
+                   best_of(args.repeat, current, [line]), 1, unit="line")
+
+
+def traced_size(build):
+    """Bytes still allocated by what build() returns, and its pickled size"""
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    result = build()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return after - before, len(pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def bench_record_memory(processor, rng, args):
+    """Memory and pickled size of parsed invoices, as legacy dicts and as records, per 100k items"""
+    docs = [make_invoice_text(rng, 27000 + i, args.items) for i in range(-(-args.memory_items // args.items))]
+    lines = [doc.split('\n') for doc in docs]
+    count = sum(len(processor.parse_invoice_lines(doc).items) for doc in lines)
+
+    legacy_memory, legacy_pickle = traced_size(lambda: [legacy_parse_invoice(doc) for doc in docs])
+    current_memory, current_pickle = traced_size(lambda: [processor.parse_invoice_lines(doc) for doc in lines])
+    scale = 100000 / count
+    print(f"{'memory per 100k items':<32} legacy {legacy_memory * scale / 2**20:8.1f} MB        "
+          f"current {current_memory * scale / 2**20:6.1f} MB")
+    print(f"{'pickled size per 100k items':<32} legacy {legacy_pickle * scale / 2**20:8.1f} MB        "
+          f"current {current_pickle * scale / 2**20:6.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the invoice and receipt text parsers")
+    parser.add_argument("--docs", type=int, default=2000, help="Documents per corpus (default: 2000)")
+    parser.add_argument("--items", type=int, default=25, help="Line items per document (default: 25)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repetitions, best is kept (default: 5)")
+    parser.add_argument("--line-length", type=int, default=10000,
+                        help="Length of the long-line stress cases (default: 10000)")
+    parser.add_argument("--memory-items", type=int, default=100000,
+                        help="Parsed line items held for the memory comparison (default: 100000)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the synthetic corpus")
+    args = parser.parse_args()
+
+    processor = InvoiceProcessor()
+    rng = random.Random(args.seed)
+
+    bench_invoices(processor, rng, args)
+    bench_receipt_headers(processor, rng, args)
+    bench_receipt_items(processor, rng, args)
+    bench_long_lines(rng, args)
+    bench_record_memory(processor, rng, args)
+
+
+if __name__ == "__main__":
+    main()
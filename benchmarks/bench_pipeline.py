@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Stage-by-stage timing of the InvoiceProcessor pipeline on synthetic corpora
+
+For each corpus size a synthetic set of invoices and receipts is generated (see
+synthetic_documents.py) and the pipeline is run one stage at a time:
+
+    extract   PDF text extraction
+    parse     header and line-item parsing of the extracted text
+    save      line-item table, invoice_items, receipt_items, combined_items and individual CSVs
+    track     price tracking table
+    analyze   consecutive price changes
+    report    PDF price increase report
+
+Results are printed as a table and written as JSON.
+
+Usage:
+    python benchmarks/bench_pipeline.py                           # 10, 1000 and 10000 documents
+    python benchmarks/bench_pipeline.py --sizes 10 100 --output bench.json
+    python benchmarks/bench_pipeline.py --work-dir corpora/       # Keep and reuse generated corpora
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from process_invoices import InvoiceProcessor, ReceiptDocument
+from synthetic_documents import generate_corpus
+
+STAGES = ['extract', 'parse', 'save', 'track', 'analyze', 'report']
+
+
+@contextlib.contextmanager
+def timed(timings, stage, quiet):
+    """Time a stage, silencing the pipeline's progress output when quiet"""
+    with open(os.devnull, 'w') as devnull:
+        with contextlib.redirect_stdout(devnull if quiet else sys.stdout):
+            start = time.perf_counter()
+            yield
+            timings[stage] = time.perf_counter() - start
+
+
+def extract_texts(processor, pdf_files):
+    texts = processor.process_files(pdf_files, processor.extract_text_from_pdf)
+    if len(texts) != len(pdf_files):
+        raise RuntimeError("Some synthetic documents failed to extract")
+    return list(zip(pdf_files, texts))
+
+
+def run_stages(processor, invoice_files, receipt_files, quiet):
+    """Run the pipeline one stage at a time and return (timings, line item count)"""
+    timings = {}
+
+    with timed(timings, 'extract', quiet):
+        invoice_texts = extract_texts(processor, invoice_files)
+        receipt_texts = extract_texts(processor, receipt_files)
+
+    with timed(timings, 'parse', quiet):
+        invoices = []
+        for pdf_file, text in invoice_texts:
+            parsed = processor.parse_invoice_lines(text.split('\n'))
+            invoices.append(parsed._replace(file_name=pdf_file.name))
+        receipts = []
+        for pdf_file, text in receipt_texts:
+            receipts.append(ReceiptDocument(
+                file_name=pdf_file.name,
+                receipt_number=processor.parse_receipt_number(text),
+                date=processor.parse_receipt_date(text),
+                items=processor.parse_receipt_items(text)
+            ))
+
+    with timed(timings, 'save', quiet):
+        line_items = processor.build_line_items(invoices, receipts)
+        processor.save_items_data(line_items)
+        processor.save_individual_invoice_csvs(line_items)
+        processor.save_receipt_data(line_items)
+        processor.save_combined_data(line_items)
+
+    with timed(timings, 'track', quiet):
+        price_df = processor.create_price_tracking(line_items)
+
+    with timed(timings, 'analyze', quiet):
+        processor.analyze_price_changes(price_df)
+
+    with timed(timings, 'report', quiet):
+        processor.generate_price_report()
+
+    return timings, len(line_items)
+
+
+def bench_size(documents, args, work_dir):
+    receipts = int(round(documents * args.receipt_share))
+    invoices = documents - receipts
+    corpus_dir = work_dir / f"corpus_{documents}_seed{args.seed}"
+
+    generation_seconds = None
+    if not (corpus_dir / "Invoices").exists():
+        start = time.perf_counter()
+        generate_corpus(corpus_dir, invoices=invoices, receipts=receipts,
+                        items_per_document=(args.min_items, args.max_items), pages=args.pages,
+                        terms_pages=args.terms_pages, seed=args.seed)
+        generation_seconds = time.perf_counter() - start
+
+    previous_dir = os.getcwd()
+    os.chdir(corpus_dir)
+    try:
+        # A reused --work-dir still holds the last report, which must not be skipped
+        processor = InvoiceProcessor(invoice_dir="Invoices", receipts_dir="receipts", workers=args.workers,
+                                     use_sibling_csvs=False, force_report=True)
+        invoice_files = processor.find_invoice_files()
+        receipt_files = processor.find_receipt_files()
+        timings, line_items = run_stages(processor, invoice_files, receipt_files, not args.verbose)
+    finally:
+        os.chdir(previous_dir)
+
+    return {
+        'documents': documents,
+        'invoices': len(invoice_files),
+        'receipts': len(receipt_files),
+        'line_items': line_items,
+        'generation_seconds': generation_seconds,
+        'stages': timings,
+        'total_seconds': sum(timings.values()),
+    }
+
+
+def print_table(results):
+    header = f"{'docs':>7} {'items':>8} " + " ".join(f"{stage:>9}" for stage in STAGES) + f" {'total':>9}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        stages = " ".join(f"{result['stages'][stage]:9.3f}" for stage in STAGES)
+        print(f"{result['documents']:>7} {result['line_items']:>8} {stages} {result['total_seconds']:9.3f}")
+    print("(seconds per stage)")
+
+
+def environment():
+    import pandas
+    import pdfplumber
+    import reportlab
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'pandas': pandas.__version__,
+        'pdfplumber': pdfplumber.__version__,
+        'reportlab': reportlab.Version,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time each InvoiceProcessor stage on synthetic corpora")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000],
+                        help="Corpus sizes in documents (default: 10 1000 10000)")
+    parser.add_argument("--receipt-share", type=float, default=0.2,
+                        help="Fraction of documents that are receipts (default: 0.2)")
+    parser.add_argument("--min-items", type=int, default=5, help="Minimum line items per document (default: 5)")
+    parser.add_argument("--max-items", type=int, default=25, help="Maximum line items per document (default: 25)")
+    parser.add_argument("--pages", type=int, default=1, help="Pages the invoice items are spread over (default: 1)")
+    parser.add_argument("--terms-pages", type=int, default=0,
+                        help="Terms pages after each invoice's totals block (default: 0)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for extraction (default: 1)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the corpora (default: 0)")
+    parser.add_argument("--work-dir", default=None,
+                        help="Directory to generate corpora in and reuse them from (default: a temporary directory)")
+    parser.add_argument("--output", default="bench_pipeline.json", help="JSON results file (default: bench_pipeline.json)")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own progress output")
+    args = parser.parse_args()
+
+    # process_invoices imports these on first use; keep that out of the first stage timings
+    import pandas, pdfplumber, reportlab.platypus  # noqa: F401
+
+    output = Path(args.output).resolve()
+    temporary = args.work_dir is None
+    work_dir = Path(tempfile.mkdtemp(prefix="bench_pipeline_") if temporary else args.work_dir).resolve()
+    work_dir.mkdir(parents=True, exist_ok=True)
+
+    results = []
+    try:
+        for documents in args.sizes:
+            print(f"Benchmarking {documents} documents...")
+            results.append(bench_size(documents, args, work_dir))
+    finally:
+        if temporary:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print()
+    print_table(results)
+
+    with open(output, 'w') as f:
+        json.dump({
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'environment': environment(),
+            'settings': {key: value for key, value in vars(args).items() if key not in ('output', 'verbose')},
+            'results': results,
+        }, f, indent=2)
+    print(f"Wrote results to {output}")
+
+
+if __name__ == "__main__":
+    main()
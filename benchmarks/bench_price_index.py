@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark of point-in-time price lookups with PriceIndex
+
+Builds a synthetic price history (as in bench_analyze.py), indexes it and
+compares as-of lookups against filtering the price tracking table with pandas,
+which is what answering "what did we pay for X on D" took before the index.
+Every answer is checked against the pandas result.
+
+Usage:
+    python benchmarks/bench_price_index.py                     # 1,000,000 observations
+    python benchmarks/bench_price_index.py --rows 200000 --lookups 1000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_analyze import make_price_history
+from process_invoices import InvoiceProcessor, PriceIndex
+
+
+def pandas_price_as_of(price_df, item_name, on):
+    """The last price of the item on or before the date, by filtering the whole table"""
+    rows = price_df[(price_df['item_name'] == item_name) & (price_df['date'] <= on)]
+    return rows['price_per_item'].iloc[-1] if len(rows) else np.nan
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark point-in-time price lookups")
+    parser.add_argument("--rows", type=int, default=1000000, help="Price observations (default: 1000000)")
+    parser.add_argument("--items", type=int, default=2000, help="Distinct items (default: 2000)")
+    parser.add_argument("--lookups", type=int, default=200,
+                        help="Single lookups timed against pandas filtering (default: 200)")
+    parser.add_argument("--batch", type=int, default=100000, help="Pairs in the batch lookup (default: 100000)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    args = parser.parse_args()
+
+    history = make_price_history(args.rows, args.items, 0.2, args.seed)
+    processor = InvoiceProcessor()
+    price_df = processor.with_item_ids(history)
+
+    start = time.perf_counter()
+    index = PriceIndex.from_price_tracking(price_df, processor.item_catalog())
+    print(f"build index over {len(history)} observations: {time.perf_counter() - start:8.3f}s")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        index_file = os.path.join(work_dir, "price_index.npz")
+        index.save(index_file)
+        start = time.perf_counter()
+        index = PriceIndex.load(index_file, processor.item_catalog())
+        print(f"load index ({os.path.getsize(index_file) / 2**20:.1f} MB):           "
+              f"{(time.perf_counter() - start) * 1000:8.2f} ms")
+
+    rng = np.random.default_rng(args.seed)
+    names = history['item_name'].unique()
+    first, last = history['date'].min(), history['date'].max()
+    span = (last - first).days + 60
+
+    def random_pairs(count):
+        days = rng.integers(0, span, count)
+        return [(name, (first - pd.Timedelta(days=30) + pd.Timedelta(days=int(day))).to_pydatetime())
+                for name, day in zip(rng.choice(names, count), days)]
+
+    pairs = random_pairs(args.lookups)
+    start = time.perf_counter()
+    expected = [pandas_price_as_of(history, name, on) for name, on in pairs]
+    pandas_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    single = [index.price_as_of(name, on) for name, on in pairs]
+    index_seconds = time.perf_counter() - start
+    single = np.array([np.nan if price is None else price for price in single])
+    assert np.array_equal(single, np.array(expected), equal_nan=True), "single lookups differ from pandas"
+    print(f"single lookup: pandas filter {pandas_seconds / len(pairs) * 1000:8.3f} ms   "
+          f"index {index_seconds / len(pairs) * 1e6:7.1f} us   "
+          f"speedup {pandas_seconds / index_seconds:7.0f}x")
+
+    batch = random_pairs(args.batch)
+    start = time.perf_counter()
+    prices = index.prices_as_of(batch)
+    batch_seconds = time.perf_counter() - start
+    check = [index.price_as_of(name, on) for name, on in batch[:1000]]
+    assert np.array_equal(prices[:1000], np.array([np.nan if price is None else price for price in check]),
+                          equal_nan=True), "batch lookups differ from single lookups"
+    print(f"batch lookup of {len(batch)} pairs:        {batch_seconds:8.3f}s "
+          f"({batch_seconds / len(batch) * 1e6:.2f} us per pair)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Render benchmark for the price increase report table
+
+Builds the "Detailed Price Increases" table for a synthetic set of price
+increases and times the full PDF build with the current create_price_table
+against the original implementation kept below. The cell text of both tables
+is checked to be identical.
+
+Usage:
+    python benchmarks/bench_report.py                  # 10,000 rows
+    python benchmarks/bench_report.py --rows 2000 --repeat 3
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_LEFT
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from process_invoices import InvoiceProcessor
+
+ITEM_NAMES = [
+    'SWETHA TF SESAME OIL 2LT X 6', 'AMRUTHA ROASTED DALIYA SPLIT 1LB', 'SWETHA TF IDLI RICE 20 LB',
+    'ROYAL BASMATI RICE 20LB', 'VERKA YOGURT BUCKET 32 LBS', 'NANAK FROZEN GULAB JAMUN BUCKET 200 Pcs',
+    'AHOKA KESAR MANGO PULP 6 X 29 OZ (850 GMS) OTS CANS', 'MIF CHILLI POWDER 4 LB',
+    'HR FRZN RESTAURANT PUNJABI SAMOSA 1.60 KG * 6 (40 PCS)', 'VERKA PANEER 4 X 5LB',
+]
+
+
+def legacy_create_price_table(story, styles, data):
+    """The original create_price_table, returning its table"""
+    story.append(Paragraph("Detailed Price Increases", styles['Heading2']))
+    story.append(Spacer(1, 0.1*inch))
+    table_data = [['Item Name', 'Prev Price', 'Prev Date', 'New Price', 'New Date', 'Increase', '% Change']]
+    for _, row in data.iterrows():
+        item_name = row['item_name']
+        if len(item_name) > 35:
+            item_para = Paragraph(item_name, ParagraphStyle('ItemName', fontSize=7, leading=8, alignment=TA_LEFT))
+        else:
+            item_para = item_name
+        table_data.append([
+            item_para,
+            f"${row['previous_price']:.2f}",
+            row['previous_date'],
+            f"${row['current_price']:.2f}",
+            row['current_date'],
+            f"${row['price_change']:.2f}",
+            f"{row['percentage_change']:.2f}%"
+        ])
+    table = Table(table_data, colWidths=[2.4*inch, 0.65*inch, 0.85*inch, 0.65*inch, 0.85*inch, 0.65*inch, 0.65*inch])
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 8),
+        ('FONTSIZE', (0, 1), (0, -1), 7),
+        ('ALIGN', (0, 1), (0, -1), 'LEFT'),
+        ('ALIGN', (1, 1), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 1), (-1, -1), 'TOP'),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('TEXTCOLOR', (6, 1), (6, -1), colors.red),
+        ('FONTNAME', (6, 1), (6, -1), 'Helvetica-Bold'),
+    ]))
+    for i, (_, row) in enumerate(data.iterrows(), 1):
+        if row['percentage_change'] > 5:
+            table.setStyle(TableStyle([('BACKGROUND', (0, i), (-1, i), colors.mistyrose)]))
+    story.append(table)
+    story.append(Spacer(1, 0.3*inch))
+    return table
+
+
+def make_increases(rows, seed):
+    rng = random.Random(seed)
+    records = []
+    for _ in range(rows):
+        previous = round(rng.uniform(1, 100), 2)
+        current = round(previous * rng.uniform(1.001, 1.3), 2) + 0.01
+        records.append({
+            'item_name': rng.choice(ITEM_NAMES),
+            'previous_date': f"{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/2024",
+            'current_date': f"{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/2025",
+            'previous_price': previous,
+            'current_price': current,
+            'price_change': current - previous,
+            'percentage_change': round((current - previous) / previous * 100, 2),
+        })
+    return pd.DataFrame(records).sort_values('percentage_change', ascending=False)
+
+
+def cell_text(cell):
+    return cell.text if isinstance(cell, Paragraph) else cell
+
+
+def build(create_table, data, path):
+    """Time the table construction and the PDF build separately"""
+    styles = getSampleStyleSheet()
+    story = []
+    start = time.perf_counter()
+    create_table(story, styles, data)
+    prepared = time.perf_counter()
+    # Building the document consumes the story and splits the tables, so read the cells first.
+    # Long tables may come in chunks that each start with the header row.
+    tables = [flowable._cellvalues for flowable in story if isinstance(flowable, Table)]
+    cells = [[cell_text(cell) for cell in row] for row in tables[0][:1] + [row for t in tables for row in t[1:]]]
+    SimpleDocTemplate(path, pagesize=A4, rightMargin=0.5*inch, leftMargin=0.5*inch,
+                      topMargin=1*inch, bottomMargin=1*inch).build(story)
+    return prepared - start, time.perf_counter() - prepared, cells
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the report's price table rendering")
+    parser.add_argument("--rows", type=int, default=10000, help="Price increases in the table (default: 10000)")
+    parser.add_argument("--repeat", type=int, default=1, help="Timing repetitions, best is kept (default: 1)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    args = parser.parse_args()
+
+    data = make_increases(args.rows, args.seed)
+    processor = InvoiceProcessor()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        results = {}
+        for name, create_table in (("legacy", legacy_create_price_table),
+                                   ("current", processor.create_price_table)):
+            path = os.path.join(work_dir, f"{name}.pdf")
+            runs = [build(create_table, data, path) for _ in range(args.repeat)]
+            prepare, render, cells = min(runs, key=lambda run: run[0] + run[1])
+            results[name] = (prepare, render, os.path.getsize(path), cells)
+            print(f"{name:<8} table {prepare:7.3f}s   build {render:7.3f}s   total {prepare + render:7.3f}s   "
+                  f"{results[name][2] / 1024:8.0f} KB")
+
+    assert results["legacy"][3] == results["current"][3], "table cells differ"
+    legacy_total = sum(results["legacy"][:2])
+    current_total = sum(results["current"][:2])
+    print(f"{args.rows} rows: speedup {legacy_total / current_total:.2f}x, identical cell text")
+
+
+if __name__ == "__main__":
+    main()
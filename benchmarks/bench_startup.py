@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Startup time of process_invoices.py, checked against a budget
+
+Measures two things in fresh interpreters:
+
+    import     python -X importtime -c "import process_invoices"
+    no-op run  process_invoices.py --incremental in a directory whose PDFs are all
+               already in the manifest, i.e. a cron run that finds nothing new
+
+Neither may import pandas, numpy, pdfplumber or reportlab. The script exits with
+status 1 when either takes longer than its budget, so it can run as a CI check.
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 10 --noop-budget 0.3
+"""
+
+import argparse
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from synthetic_documents import generate_corpus
+
+SCRIPT = Path(__file__).resolve().parent.parent / "process_invoices.py"
+HEAVY_MODULES = ('pandas', 'numpy', 'pdfplumber', 'reportlab')
+
+
+def parse_importtime(stderr):
+    """Map each top-level module to its cumulative import time in seconds"""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def heavy_imports(times):
+    return sorted({name.split('.')[0] for name in times} & set(HEAVY_MODULES))
+
+
+def measure_import(runs):
+    durations = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import process_invoices'],
+                                cwd=SCRIPT.parent, capture_output=True, text=True, check=True)
+        times = parse_importtime(result.stderr)
+        durations.append(times['process_invoices'])
+    return statistics.median(durations), heavy_imports(times)
+
+
+def measure_noop_run(runs, work_dir):
+    generate_corpus(work_dir, invoices=3, receipts=0, seed=0)
+    command = [sys.executable, str(SCRIPT), '--incremental']
+    subprocess.run(command, cwd=work_dir, capture_output=True, check=True)  # Builds the manifest
+
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-X', 'importtime'] + command[1:], cwd=work_dir,
+                                capture_output=True, text=True, check=True)
+        durations.append(time.perf_counter() - start)
+        if 'No new or changed invoices' not in result.stdout:
+            raise RuntimeError(f"Expected a run with nothing to do, got:\n{result.stdout}")
+    return statistics.median(durations), heavy_imports(parse_importtime(result.stderr))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the startup time of process_invoices.py")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per measurement, median is kept (default: 5)")
+    parser.add_argument("--import-budget", type=float, default=0.15,
+                        help="Budget for importing the module in seconds (default: 0.15)")
+    parser.add_argument("--noop-budget", type=float, default=0.5,
+                        help="Budget for a run with nothing new to parse in seconds (default: 0.5)")
+    args = parser.parse_args()
+
+    import_seconds, import_heavy = measure_import(args.runs)
+    work_dir = tempfile.mkdtemp(prefix="bench_startup_")
+    try:
+        noop_seconds, noop_heavy = measure_noop_run(args.runs, work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    failures = []
+    for name, seconds, budget, heavy in (("import", import_seconds, args.import_budget, import_heavy),
+                                         ("no-op run", noop_seconds, args.noop_budget, noop_heavy)):
+        within = seconds <= budget and not heavy
+        print(f"{name:<10} {seconds * 1000:8.1f} ms   budget {budget * 1000:6.0f} ms   "
+              f"heavy imports: {', '.join(heavy) or 'none'}   {'ok' if within else 'FAIL'}")
+        if not within:
+            failures.append(name)
+
+    if failures:
+        print(f"Startup budget exceeded: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
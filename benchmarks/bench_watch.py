@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Latency from a PDF landing in Invoices/ to its prices being in the outputs
+
+Generates a synthetic corpus, processes all but the last --drops invoices, then
+moves the held-back invoices into Invoices/ one at a time and measures how long
+it takes until combined_items, price_tracking and price_changes include them:
+
+    watch     a running `process_invoices.py watch`, imports and workers warm
+    one-shot  a fresh `process_invoices.py --incremental` per file, as when the
+              batch script is rerun by hand
+
+A one-shot run also rebuilds the report, as the batch script does; watch defers
+it until no PDF has landed for --debounce seconds, which here is never.
+
+Usage:
+    python benchmarks/bench_watch.py                       # 200 invoices, 10 drops
+    python benchmarks/bench_watch.py --invoices 1000 --drops 20 --workers 4
+"""
+
+import argparse
+import os
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from synthetic_documents import generate_corpus
+
+SCRIPT = Path(__file__).resolve().parent.parent / "process_invoices.py"
+
+
+def prepare_corpus(work_dir, invoices, drops, seed):
+    """Corpus with the last `drops` invoices held back in hold/, the rest already processed"""
+    invoice_dir, _ = generate_corpus(work_dir, invoices=invoices, receipts=0, seed=seed)
+    hold_dir = Path(work_dir) / "hold"
+    hold_dir.mkdir()
+    held = sorted(invoice_dir.glob("*.pdf"))[-drops:]
+    for pdf_file in held:
+        os.replace(pdf_file, hold_dir / pdf_file.name)
+    subprocess.run([sys.executable, str(SCRIPT), '--incremental'], cwd=work_dir, capture_output=True, check=True)
+    return [hold_dir / pdf_file.name for pdf_file in held]
+
+
+def read_until(process, marker):
+    for line in process.stdout:
+        if marker in line:
+            return line
+    raise RuntimeError(f"watch exited before printing {marker!r}")
+
+
+def measure_watch(work_dir, held, workers):
+    command = [sys.executable, '-u', str(SCRIPT), 'watch', '--workers', str(workers), '--debounce', '3600']
+    process = subprocess.Popen(command, cwd=work_dir, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    try:
+        mode = read_until(process, "for PDFs").strip().rsplit(' ', 1)[-1].strip('()')
+        read_until(process, "No new or changed")  # Caught up with the corpus run
+        latencies = []
+        for pdf_file in held:
+            start = time.perf_counter()
+            os.replace(pdf_file, Path(work_dir) / "Invoices" / pdf_file.name)
+            read_until(process, "Updated outputs in")
+            latencies.append(time.perf_counter() - start)
+    finally:
+        process.send_signal(signal.SIGINT)
+        process.communicate(timeout=120)
+    return latencies, mode
+
+
+def measure_one_shot(work_dir, held):
+    latencies = []
+    for pdf_file in held:
+        start = time.perf_counter()
+        os.replace(pdf_file, Path(work_dir) / "Invoices" / pdf_file.name)
+        subprocess.run([sys.executable, str(SCRIPT), '--incremental'], cwd=work_dir, capture_output=True,
+                       check=True)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def describe(latencies):
+    ordered = sorted(latencies)
+    p90 = ordered[max(0, -(-len(ordered) * 9 // 10) - 1)]
+    return (f"p50 {statistics.median(ordered) * 1000:7.1f} ms   p90 {p90 * 1000:7.1f} ms   "
+            f"max {ordered[-1] * 1000:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure file-landing-to-output latency of watch mode")
+    parser.add_argument("--invoices", type=int, default=200, help="Invoices in the corpus (default: 200)")
+    parser.add_argument("--drops", type=int, default=10, help="Invoices dropped in one at a time (default: 10)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for watch (default: 1)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    args = parser.parse_args()
+
+    results = {}
+    for name in ("watch", "one-shot"):
+        work_dir = tempfile.mkdtemp(prefix="bench_watch_")
+        try:
+            held = prepare_corpus(work_dir, args.invoices, args.drops, args.seed)
+            if name == "watch":
+                latencies, mode = measure_watch(work_dir, held, args.workers)
+                name = f"watch ({mode})"
+            else:
+                latencies = measure_one_shot(work_dir, held)
+            results[name] = latencies
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"{args.drops} invoices dropped into a corpus of {args.invoices - args.drops}:")
+    for name, latencies in results.items():
+        print(f"{name:<18} {describe(latencies)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Synthetic Mother India Foods invoices and free-form receipts for benchmarking
+
+Writes PDFs whose extracted text has the same layout as the real invoices in
+Invoices/, so they go through process_invoices.py unchanged. Prices follow a
+random walk across documents so the price tracking and analysis stages have
+changes to find.
+
+Usage:
+    python benchmarks/synthetic_documents.py out/ --invoices 1000 --receipts 200
+    python benchmarks/synthetic_documents.py out/ --invoices 50 --pages 3 --terms-pages 2
+"""
+
+import argparse
+import random
+from datetime import date, timedelta
+from pathlib import Path
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+BRANDS = ['SWETHA TF', 'AMRUTHA', 'ROYAL', 'VERKA', 'NANAK', 'AHOKA', 'MIF', 'DEEP', 'LAXMI', 'SWAD']
+PRODUCTS = [
+    ('SESAME OIL 2LT X 6', 97.98), ('ROASTED DALIYA SPLIT 1LB', 1.98), ('IDLI RICE 20 LB', 19.98),
+    ('BASMATI RICE 20LB', 23.99), ('YOGURT BUCKET 32 LBS', 41.99), ('FROZEN GULAB JAMUN BUCKET 200 Pcs', 89.99),
+    ('KESAR MANGO PULP 6 X 29 OZ (850 GMS) OTS CANS', 18.99), ('CHILLI POWDER 4 LB', 15.99),
+    ('CORIANDER POWDER 1 LB', 3.49), ('PANEER 4 X 5LB', 54.99), ('TOOR DAL 4 LB', 8.99),
+    ('TURMERIC POWDER 7 OZ', 2.49), ('GHEE 32 OZ', 16.99), ('CHANA DAL 2 LB', 3.99), ('URAD DAL 4 LB', 9.49),
+]
+
+LINE_HEIGHT = 14
+TOP = 760
+BOTTOM = 60
+
+
+class PriceBook:
+    """Catalog of items whose prices drift as documents are generated"""
+
+    def __init__(self, rng, items, drift, change_probability):
+        self.rng = rng
+        self.drift = drift
+        self.change_probability = change_probability
+        catalog = [(f"{brand} {product}", price) for brand in BRANDS for product, price in PRODUCTS]
+        rng.shuffle(catalog)
+        self.prices = dict(catalog[:items])
+        self.names = list(self.prices)
+
+    def advance(self):
+        """Move every price one step along its random walk"""
+        for name, price in self.prices.items():
+            if self.rng.random() < self.change_probability:
+                self.prices[name] = max(0.25, round(price * (1 + self.rng.uniform(-self.drift, self.drift)), 2))
+
+    def sample(self, count):
+        return self.rng.sample(self.names, min(count, len(self.names)))
+
+
+def write_pdf(path, pages):
+    """Write one PDF with one text line per drawString, one list of lines per page"""
+    pdf = canvas.Canvas(str(path), pagesize=letter)
+    for page_number, lines in enumerate(pages):
+        if page_number:
+            pdf.showPage()
+        pdf.setFont("Helvetica", 9)
+        y = TOP
+        for line in lines:
+            pdf.drawString(40, y, line)
+            y -= LINE_HEIGHT
+    pdf.save()
+
+
+def invoice_pages(number, issued, items, pages, terms_pages):
+    """Lay out an invoice the way the real ones read after text extraction"""
+    header = [
+        "MOTHER INDIA FOODS LLC",
+        "1800 NW 169th Place STE D #",
+        "BEAVERTON, OR 97006",
+        "+1 5039241813",
+        f"BILL TO SHIP TO INVOICE {number}",
+        "CHENNAI MASALA CHENNAI MASALA",
+        "2088 NW Stucki Ave, CHENNAI MASALA",
+        f"DATE {issued:%m/%d/%Y} TERMS Net 10",
+        f"DUE DATE {issued + timedelta(days=10):%m/%d/%Y}",
+    ]
+    item_lines = []
+    total = 0.0
+    for name, quantity, rate in items:
+        amount = round(quantity * rate, 2)
+        total += amount
+        item_lines.append(f"{name} {quantity} {rate:.2f} {amount:.2f}")
+
+    per_page = max(1, -(-len(item_lines) // pages))
+    max_lines = (TOP - BOTTOM) // LINE_HEIGHT - len(header) - 3
+    per_page = min(per_page, max_lines)
+
+    laid_out = []
+    for start in range(0, max(len(item_lines), 1), per_page):
+        laid_out.append(header + ["DESCRIPTION QTY RATE AMOUNT"] + item_lines[start:start + per_page])
+    laid_out[-1] += [f"VERIFIED/ EMAILED PAYMENT {total:.2f}", "TOTAL DUE $0.00"]
+
+    for page in range(terms_pages):
+        laid_out.append([f"TERMS AND CONDITIONS {page + 1}"] +
+                        ["Returns accepted within 7 days with the original invoice. Prices subject to change."] * 40)
+    return laid_out
+
+
+def receipt_pages(rng, number, issued, items):
+    """Lay out a free-form store receipt"""
+    lines = [
+        "SPICE BAZAAR",
+        "4500 SW Main St, Portland OR",
+        f"Receipt #{number}",
+        f"Date: {issued:%m/%d/%Y}",
+    ]
+    subtotal = 0.0
+    for name, quantity, rate in items:
+        amount = round(quantity * rate, 2)
+        subtotal += amount
+        if quantity == 1 and rng.random() < 0.5:
+            lines.append(f"{name} {amount:.2f}")
+        else:
+            lines.append(f"{name} {quantity} {amount:.2f}")
+    lines += [f"SUBTOTAL {subtotal:.2f}", "TAX 0.00", f"TOTAL {subtotal:.2f}", "Thank you for shopping with us"]
+    return [lines]
+
+
+def generate_corpus(output_dir, invoices=100, receipts=0, items_per_document=(5, 25), pages=1,
+                    terms_pages=0, catalog_size=60, drift=0.05, change_probability=0.1, seed=0,
+                    start_date=date(2023, 1, 2)):
+    """Generate a corpus under output_dir/Invoices and output_dir/receipts
+
+    Returns (invoice_dir, receipts_dir). Documents are dated in ascending order and
+    prices take one random-walk step per document.
+    """
+    rng = random.Random(seed)
+    book = PriceBook(rng, catalog_size, drift, change_probability)
+
+    invoice_dir = Path(output_dir) / "Invoices"
+    receipts_dir = Path(output_dir) / "receipts"
+    invoice_dir.mkdir(parents=True, exist_ok=True)
+    receipts_dir.mkdir(parents=True, exist_ok=True)
+
+    kinds = ['invoice'] * invoices + ['receipt'] * receipts
+    rng.shuffle(kinds)
+
+    issued = start_date
+    numbers = {'invoice': 30000, 'receipt': 5000}
+    for kind in kinds:
+        book.advance()
+        issued += timedelta(days=rng.choice([0, 1, 1, 2, 3]))
+        numbers[kind] += 1
+        names = book.sample(rng.randint(*items_per_document))
+
+        if kind == 'receipt':
+            items = [(name, rng.randint(1, 3), book.prices[name]) for name in names]
+            write_pdf(receipts_dir / f"Receipt_{numbers[kind]}.pdf",
+                      receipt_pages(rng, numbers[kind], issued, items))
+        else:
+            items = [(name, rng.randint(1, 50), book.prices[name]) for name in names]
+            write_pdf(invoice_dir / f"Invoice_{numbers[kind]}_from_MOTHER_INDIA_FOODS_LLC.pdf",
+                      invoice_pages(numbers[kind], issued, items, pages, terms_pages))
+
+    return invoice_dir, receipts_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic invoice and receipt PDFs")
+    parser.add_argument("output_dir", help="Directory to create Invoices/ and receipts/ in")
+    parser.add_argument("--invoices", type=int, default=100, help="Number of invoices (default: 100)")
+    parser.add_argument("--receipts", type=int, default=0, help="Number of receipts (default: 0)")
+    parser.add_argument("--min-items", type=int, default=5, help="Minimum line items per document (default: 5)")
+    parser.add_argument("--max-items", type=int, default=25, help="Maximum line items per document (default: 25)")
+    parser.add_argument("--pages", type=int, default=1, help="Pages the line items are spread over (default: 1)")
+    parser.add_argument("--terms-pages", type=int, default=0,
+                        help="Terms pages after the totals block (default: 0)")
+    parser.add_argument("--catalog-size", type=int, default=60, help="Distinct items to draw from (default: 60)")
+    parser.add_argument("--drift", type=float, default=0.05,
+                        help="Largest relative price move per step (default: 0.05)")
+    parser.add_argument("--change-probability", type=float, default=0.1,
+                        help="Chance an item's price moves per document (default: 0.1)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    args = parser.parse_args()
+
+    invoice_dir, receipts_dir = generate_corpus(
+        args.output_dir, invoices=args.invoices, receipts=args.receipts,
+        items_per_document=(args.min_items, args.max_items), pages=args.pages,
+        terms_pages=args.terms_pages, catalog_size=args.catalog_size, drift=args.drift,
+        change_probability=args.change_probability, seed=args.seed)
+    print(f"Wrote {args.invoices} invoices to {invoice_dir} and {args.receipts} receipts to {receipts_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,63 +6,1284 @@ Extracts item information and tracks price changes over time from both invoices
 Usage:
     python process_invoices.py                    # Process only invoices
     python process_invoices.py /path/to/receipts  # Process invoices and receipts
+    python process_invoices.py --workers 8        # Extract PDFs on 8 worker processes
+    python process_invoices.py --no-cache         # Always re-extract text from the PDFs
+    python process_invoices.py --incremental      # Only parse PDFs added or changed since the last run
+    python process_invoices.py --metrics          # Report time and memory per stage
+    python process_invoices.py --metrics --trace-memory  # Also trace Python allocations (slower)
+    python process_invoices.py --format parquet   # Write the tables as Parquet (or feather) instead of CSV
+    python process_invoices.py --ledger           # Keep the price history in a SQLite ledger
+    python process_invoices.py --force            # Rebuild the PDF report even if its data is unchanged
+
+Stages can also run one at a time, each reading the previous stage's saved output:
+    python process_invoices.py extract /path/to/receipts --incremental
+    python process_invoices.py track
+    python process_invoices.py analyze
+    python process_invoices.py report
+
+Or keep running and process PDFs as they land in the invoice and receipt folders:
+    python process_invoices.py watch /path/to/receipts --workers 4
+
+Look up what was paid for an item on a date (the last price on or before it):
+    python process_invoices.py price "VERKA PANEER 4 X 5LB" 2025-03-14
+
+pandas, numpy, pdfplumber and reportlab are imported by the stages that use them,
+so a run that finds nothing new to parse starts and exits quickly.
 """
 
+from __future__ import annotations
+
 import os
 import re
 import csv
-import pandas as pd
+import json
+import math
+import time
+import sys
+import select
+import struct
+import hashlib
+import importlib
+from array import array
+from contextlib import closing, contextmanager, nullcontext
 from datetime import datetime
 from pathlib import Path
-import pdfplumber
-from typing import List, Dict, Tuple
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from typing import Callable, Iterable, Iterator, List, Dict, NamedTuple, Optional, Set, Tuple
+
+
+class LazyModule:
+    """Stand-in for a heavy module that imports it on first attribute access"""
+    
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+    
+    def __getattr__(self, attribute: str):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
+
+
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+pdfplumber = LazyModule('pdfplumber')
+
+# Bump when invoice parsing changes so stale sibling CSVs are re-parsed
+INVOICE_PARSER_VERSION = 1
+
+# Bump when the report layout changes so a report built from unchanged data is rebuilt
+REPORT_VERSION = 1
+
+INDIVIDUAL_CSV_COLUMNS = ['item_name', 'quantity', 'rate_per_item', 'total_amount']
+
+# Every output file is a projection of the line-item table, which has the combined_items.csv layout
+LINE_ITEM_COLUMNS = ['document_number', 'date', 'file_name', 'item_name', 'quantity', 'rate_per_item',
+                     'total_amount', 'type']
+INVOICE_ITEM_COLUMNS = {'document_number': 'invoice_number', 'date': 'date', 'file_name': 'file_name',
+                        'item_name': 'item_name', 'quantity': 'quantity', 'rate_per_item': 'rate_per_item',
+                        'total_amount': 'total_amount'}
+RECEIPT_ITEM_COLUMNS = {'document_number': 'receipt_number', 'date': 'date', 'file_name': 'file_name',
+                        'item_name': 'item_name', 'quantity': 'quantity', 'rate_per_item': 'rate_per_item',
+                        'total_amount': 'total_amount', 'type': 'type'}
+PRICE_TRACKING_COLUMNS = {'date': 'date', 'item_name': 'item_name', 'rate_per_item': 'price_per_item',
+                          'document_number': 'document_number', 'type': 'document_type'}
+
+PRICE_CHANGE_COLUMNS = ['item_name', 'previous_date', 'current_date', 'previous_price', 'current_price',
+                        'price_change', 'percentage_change']
+
+# Output table formats; Parquet and Feather need pyarrow
+OUTPUT_FORMATS = {'csv': '.csv', 'parquet': '.parquet', 'feather': '.feather'}
+
+# Dtypes the columnar formats store instead of CSV text
+CATEGORY_COLUMNS = ('item_name', 'type', 'document_type')
+DATE_COLUMNS = ('date', 'previous_date', 'current_date')
+DATE_FORMAT = '%m/%d/%Y'
+
+# Columns read back as text from saved tables
+TEXT_COLUMNS = ('invoice_number', 'receipt_number', 'document_number', 'date', 'file_name', 'item_name',
+                'type', 'document_type')
+
+# Rows per table in the report's price table; an even count keeps the row banding
+PRICE_TABLE_CHUNK_ROWS = 500
+
+# Day numbers in the price index count from 1970-01-01, as datetime64[D] does
+UNIX_EPOCH_ORDINAL = datetime(1970, 1, 1).toordinal()
+
+# How long watch mode keeps gathering PDFs after the first one of a batch lands
+WATCH_SETTLE_SECONDS = 0.05
+
+# Invoice text patterns, compiled once for every document
+INVOICE_NUMBER_RE = re.compile(r'INVOICE\s+(\d+)')
+INVOICE_NUMBER_CONTINUATION_RE = re.compile(r'\s*(\d+)')
+INVOICE_DATE_RE = re.compile(r'DATE\s+(\d{2}/\d{2}/\d{4})')
+INVOICE_DATE_CONTINUATION_RE = re.compile(r'\s*(\d{2}/\d{2}/\d{4})')
+
+INVOICE_SKIP_TERMS = ('BILL TO', 'SHIP TO', 'INVOICE')
+RECEIPT_TOTAL_TERMS = ('TOTAL', 'TAX', 'SUBTOTAL', 'PAYMENT', 'CHANGE', 'CASH', 'CREDIT',
+                       'BILL TO', 'SHIP TO', 'INVOICE')
+
+
+class LineItem(NamedTuple):
+    """One item line of an invoice or receipt"""
+    description: str
+    quantity: int
+    rate: float
+    amount: float
+
+
+class LineItemColumns:
+    """Line items stored column by column, which parsers append to one item at a time
+    
+    Descriptions are interned, so an item name repeated across documents is held
+    once; quantities, rates and amounts go into typed arrays. Iterating yields
+    LineItem records. Pickling sends each numeric column as one block of bytes,
+    which is cheap for results coming back from pool workers.
+    """
+    
+    __slots__ = ('descriptions', 'quantities', 'rates', 'amounts')
+    
+    def __init__(self, items: Iterable[Tuple[str, int, float, float]] = ()):
+        self.descriptions = []
+        self.quantities = array('q')
+        self.rates = array('d')
+        self.amounts = array('d')
+        for item in items:
+            self.append(*item)
+    
+    def append(self, description: str, quantity: int, rate: float, amount: float):
+        self.descriptions.append(sys.intern(description))
+        self.quantities.append(quantity)
+        self.rates.append(rate)
+        self.amounts.append(amount)
+    
+    def extend(self, other: LineItemColumns):
+        """Append every item of another set of columns"""
+        self.descriptions += map(sys.intern, other.descriptions)
+        self.quantities += other.quantities
+        self.rates += other.rates
+        self.amounts += other.amounts
+    
+    def __len__(self) -> int:
+        return len(self.descriptions)
+    
+    def __iter__(self) -> Iterator[LineItem]:
+        return map(LineItem, self.descriptions, self.quantities, self.rates, self.amounts)
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, LineItemColumns):
+            return NotImplemented
+        return (self.descriptions == other.descriptions and self.quantities == other.quantities and
+                self.rates == other.rates and self.amounts == other.amounts)
+    
+    def __getstate__(self):
+        return self.descriptions, self.quantities, self.rates, self.amounts
+    
+    def __setstate__(self, state):
+        self.descriptions, self.quantities, self.rates, self.amounts = state
+    
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Zero-copy NumPy views of the columns, named as in the line-item table
+        
+        The views share memory with the arrays, which cannot grow while a view of
+        them is alive.
+        """
+        return {
+            'item_name': np.array(self.descriptions, dtype=object),
+            'quantity': np.frombuffer(self.quantities, dtype='int64'),
+            'rate_per_item': np.frombuffer(self.rates, dtype='float64'),
+            'total_amount': np.frombuffer(self.amounts, dtype='float64')
+        }
+
+
+class InvoiceDocument(NamedTuple):
+    """A parsed invoice: its header fields and line items"""
+    file_name: str
+    invoice_number: str
+    date: str
+    items: LineItemColumns
+
+
+class ReceiptDocument(NamedTuple):
+    """A parsed receipt: its header fields and line items"""
+    file_name: str
+    receipt_number: str
+    date: str
+    items: LineItemColumns
+
+
+def is_number_token(token: str) -> bool:
+    """Check that a token is made only of digits and dots"""
+    digits = token.replace('.', '')
+    return not digits or digits.isdecimal()
+
+
+def split_item_line(line: str, numeric_fields: int) -> Optional[List[str]]:
+    """Split a stripped item line into its description and trailing numeric fields
+    
+    The fields are peeled off the right end of the line with rsplit, so the cost is
+    linear in the line length however much noise comes before them. When there is
+    more than one field the first must be a whole-number quantity; the others are
+    digits and dots. Accepts the same lines, and returns the same pieces, as the
+    lazy description regexes this replaced, e.g. for three fields
+    ^(.+?)\\s+(\\d+)\\s+([\\d.]+)\\s+([\\d.]+)$
+    """
+    parts = line.rsplit(None, numeric_fields)
+    if len(parts) != numeric_fields + 1:
+        return None
+    if numeric_fields > 1 and not parts[1].isdecimal():
+        return None
+    for token in parts[2 if numeric_fields > 1 else 1:]:
+        if not is_number_token(token):
+            return None
+    return parts
+
+
+def scan_header_field(line: str, keyword: str, pattern: re.Pattern,
+                      continuation: re.Pattern, pending: bool) -> Tuple[str, bool]:
+    """Look for a 'KEYWORD value' header field on one line of a document
+    
+    Matches what pattern.search would find on the whole text: the keyword and its
+    value may be split across lines, so a line ending in the keyword leaves the
+    field pending for the next non-blank line. Returns (value, pending).
+    """
+    if pending:
+        if not line or line.isspace():
+            return "", True
+        continued = continuation.match(line)
+        if continued:
+            return continued.group(1), False
+    
+    if keyword in line:
+        match = pattern.search(line)
+        if match:
+            return match.group(1), False
+        return "", line.rstrip().endswith(keyword)
+    return "", False
+
+
+class PriorityPattern:
+    """A prioritized list of compiled patterns, searched until the first one matches
+    
+    Gives the same result as trying re.search for each pattern in list order. Each
+    pattern is paired with a literal that any match must contain; when the literal
+    is not in the text the scan for that pattern is skipped, so documents without
+    a date or number are rejected with a few substring checks.
+    """
+    
+    def __init__(self, patterns: List[Tuple[str, str]]):
+        self.patterns = [(literal, re.compile(pattern)) for literal, pattern in patterns]
+    
+    def search(self, text: str) -> str:
+        """Return the first capture group of the best match, or "" if nothing matches"""
+        for literal, pattern in self.patterns:
+            if literal in text:
+                match = pattern.search(text)
+                if match:
+                    return match.group(1)
+        return ""
+
+
+RECEIPT_DATE_PATTERN = PriorityPattern([
+    ('DATE', r'DATE\s+(\d{2}/\d{2}/\d{4})'),  # DATE MM/DD/YYYY
+    ('Date:', r'Date:\s*(\d{2}/\d{2}/\d{4})'),  # Date: MM/DD/YYYY
+    ('/', r'(\d{2}/\d{2}/\d{4})'),  # Just MM/DD/YYYY
+    ('/', r'(\d{1,2}/\d{1,2}/\d{4})'),  # M/D/YYYY or MM/D/YYYY
+    ('-', r'(\d{2}-\d{2}-\d{4})'),  # MM-DD-YYYY
+])
+
+RECEIPT_NUMBER_PATTERN = PriorityPattern([
+    ('RECEIPT', r'RECEIPT\s+(\d+)'),  # RECEIPT 12345
+    ('Receipt', r'Receipt\s*#?\s*(\d+)'),  # Receipt #12345 or Receipt 12345
+    ('REF', r'REF\s*#?\s*(\d+)'),  # REF #12345
+    ('Reference', r'Reference\s*#?\s*(\d+)'),  # Reference #12345
+])
+
+
+def timed_call(func: Callable, *args):
+    """Call func(*args) and return (result, elapsed seconds); picklable for pool workers"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def percentile(sorted_values: List[float], percent: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class PipelineMetrics:
+    """Wall time, CPU time and peak memory for each pipeline stage
+    
+    CPU time includes worker processes that finished during the stage. Peak memory
+    is the main process's peak resident set size so far (ru_maxrss), a high-water
+    mark, so a stage shows a higher value than the one before only if it raised
+    it. With trace_memory, each stage also runs under tracemalloc for its peak
+    Python allocations; tracing slows allocation-heavy code several times over,
+    so the times and latencies of such a run include its overhead. Per-document
+    latency is the time to extract and parse one PDF.
+    """
+    
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self.document_latencies = []
+    
+    @staticmethod
+    def peak_rss_mb() -> Optional[float]:
+        """The process's peak resident set size so far, None where resource is unavailable"""
+        try:
+            import resource
+        except ImportError:
+            return None  # Windows
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 3)
+    
+    @contextmanager
+    def stage(self, name: str):
+        tracemalloc = None
+        if self.trace_memory:
+            import tracemalloc
+            tracemalloc.start()
+        start_times = os.times()
+        start_wall = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start_wall
+            end_times = os.times()
+            cpu = sum(end - start for end, start in zip(end_times[:4], start_times[:4]))
+            self.stages[name] = {
+                'wall_seconds': round(wall, 6),
+                'cpu_seconds': round(cpu, 6),
+                'peak_rss_mb': self.peak_rss_mb()
+            }
+            if tracemalloc:
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                self.stages[name]['peak_traced_mb'] = round(peak / (1024 * 1024), 3)
+    
+    def record_latency(self, seconds: float):
+        self.document_latencies.append(seconds)
+    
+    def latency_summary(self) -> Dict:
+        latencies = sorted(self.document_latencies)
+        if not latencies:
+            return {'count': 0}
+        return {
+            'count': len(latencies),
+            'p50_seconds': round(percentile(latencies, 50), 6),
+            'p90_seconds': round(percentile(latencies, 90), 6),
+            'p99_seconds': round(percentile(latencies, 99), 6),
+            'max_seconds': round(latencies[-1], 6)
+        }
+    
+    def print_report(self):
+        print("\nPipeline Metrics:")
+        traced_header = f"{'Traced MB':>11}" if self.trace_memory else ""
+        print(f"{'Stage':<26}{'Wall (s)':>10}{'CPU (s)':>10}{'Peak RSS MB':>13}{traced_header}")
+        for name, stage in self.stages.items():
+            rss = stage['peak_rss_mb']
+            traced = f"{stage['peak_traced_mb']:>11.1f}" if self.trace_memory else ""
+            print(f"{name:<26}{stage['wall_seconds']:>10.3f}{stage['cpu_seconds']:>10.3f}"
+                  f"{'n/a' if rss is None else f'{rss:.1f}':>13}{traced}")
+        if self.trace_memory:
+            print("Measured with tracemalloc on: times and latencies include its overhead")
+        
+        summary = self.latency_summary()
+        if summary['count']:
+            print(f"Document latency over {summary['count']} PDFs: "
+                  f"p50 {summary['p50_seconds']:.3f}s, p90 {summary['p90_seconds']:.3f}s, "
+                  f"p99 {summary['p99_seconds']:.3f}s, max {summary['max_seconds']:.3f}s")
+    
+    def save(self, metrics_file: str):
+        with open(metrics_file, 'w') as f:
+            json.dump({
+                'memory_traced': self.trace_memory,
+                'stages': self.stages,
+                'document_latency': self.latency_summary()
+            }, f, indent=2)
+        print(f"Saved pipeline metrics to {metrics_file}")
+
+
+def file_sha256(path: str) -> str:
+    """Return the hex SHA-256 of a file's contents"""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def typed_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Categorical names and datetime dates for the columnar formats
+    
+    Prices stay float64: rates derived as amount / quantity (3.3699999999999997)
+    would read back from float32 as a different value (3.37) and give a stage run
+    from the saved tables other price changes than the full run.
+    """
+    df = df.copy()
+    for column in df.columns:
+        if column in CATEGORY_COLUMNS:
+            df[column] = df[column].astype('category')
+        elif column in DATE_COLUMNS and not pd.api.types.is_datetime64_any_dtype(df[column]):
+            # Only when every date survives the round trip; receipts can use other layouts
+            dates = pd.to_datetime(df[column], format=DATE_FORMAT, errors='coerce')
+            if (dates.dt.strftime(DATE_FORMAT).fillna('') == df[column].fillna('')).all():
+                df[column] = dates
+    return df
+
+
+def convert_distinct(values: pd.Series, convert: Callable) -> np.ndarray:
+    """Apply a slow element conversion to each distinct value only"""
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    return np.asarray(convert(pd.Series(uniques)))[codes]
+
+
+def untyped_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Turn a table read from Parquet or Feather back into the values its CSV would hold"""
+    for column in df.columns:
+        dtype = df[column].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype(dtype.categories.dtype)
+        elif column in DATE_COLUMNS and pd.api.types.is_datetime64_any_dtype(dtype):
+            df[column] = convert_distinct(df[column], lambda dates: dates.dt.strftime(DATE_FORMAT).fillna(''))
+        elif dtype == np.float32:
+            # Written with float32 prices by an earlier version; the shortest float32 repr is
+            # the price that was written, e.g. 2.99 not 2.9900000095
+            df[column] = convert_distinct(df[column], lambda prices: prices.astype(str).astype('float64'))
+    return df
+
+
+def write_table(df: pd.DataFrame, path: str):
+    """Write an output table as CSV, Parquet or Feather, chosen by the file suffix"""
+    suffix = Path(path).suffix
+    if suffix == '.csv':
+        df.to_csv(path, index=False)
+    elif suffix == '.parquet':
+        typed_columns(df).to_parquet(path, index=False)
+    else:
+        typed_columns(df).reset_index(drop=True).to_feather(path)
+
+
+def find_table(path: str) -> Optional[str]:
+    """The output table at path, or the newest copy of it written in another format"""
+    if os.path.exists(path):
+        return path
+    candidates = [str(Path(path).with_suffix(suffix)) for suffix in OUTPUT_FORMATS.values()]
+    candidates = [candidate for candidate in candidates if os.path.exists(candidate)]
+    return max(candidates, key=os.path.getmtime, default=None)
+
+
+def read_table(path: str, **csv_options) -> pd.DataFrame:
+    """Read an output table in any of the output formats
+    
+    Parquet and Feather tables come back with the values the CSV version would
+    have; csv_options are passed to pd.read_csv.
+    """
+    suffix = Path(path).suffix
+    if suffix == '.parquet':
+        return untyped_columns(pd.read_parquet(path))
+    if suffix == '.feather':
+        return untyped_columns(pd.read_feather(path))
+    return pd.read_csv(path, **csv_options)
+
+
+class TextCache:
+    """Persistent cache of extracted PDF text.
+    
+    Entries are keyed by the SHA-256 of the PDF bytes plus the pdfplumber version,
+    so a re-issued file or a library upgrade is simply a miss. Each entry holds the
+    text of the pages extracted so far and whether that covers the whole document,
+    so a read that stopped early can be resumed. The cache directory is kept under
+    max_bytes by evicting the least recently used entries; a hit refreshes the
+    entry's mtime, which is what eviction orders on.
+    """
+    
+    def __init__(self, cache_dir: str = ".text_cache", max_bytes: int = 256 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._total_bytes = None
+    
+    def key_for(self, pdf_path: str) -> str:
+        """Build the cache key for a PDF from its content and the pdfplumber version"""
+        return f"{file_sha256(pdf_path)}-pdfplumber-{pdfplumber.__version__}"
+    
+    def get(self, key: str) -> Optional[Tuple[List[str], bool]]:
+        """Return (page_texts, complete) for key, or None on a miss"""
+        entry = self.cache_dir / f"{key}.json"
+        try:
+            with open(entry, encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        try:
+            os.utime(entry)  # Mark as recently used
+        except OSError:
+            pass
+        return data['pages'], data['complete']
+    
+    def put(self, key: str, pages: List[str], complete: bool = True):
+        """Store page texts under key and evict old entries if the cache is over budget"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entry = self.cache_dir / f"{key}.json"
+        tmp = self.cache_dir / f"{key}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'pages': pages, 'complete': complete}, f)
+        os.replace(tmp, entry)  # Atomic, so concurrent workers never see a partial entry
+        
+        if self._total_bytes is None:
+            self._total_bytes = sum(p.stat().st_size for p in self.cache_dir.glob("*.json"))
+        else:
+            self._total_bytes += entry.stat().st_size
+        
+        if self._total_bytes > self.max_bytes:
+            self.evict()
+    
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue  # Evicted by another worker
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._total_bytes = total
+
+
+def normalize_item_name(name: str) -> str:
+    """Catalog key of an item description: upper case, with runs of whitespace collapsed"""
+    return ' '.join(name.upper().split())
+
+
+class ItemCatalog:
+    """Persistent dictionary of item names and their integer ids.
+    
+    Each distinct normalized description gets the next id the first time it is
+    seen and keeps it across runs. The catalog file lists the names in id order, so
+    an item's name (the spelling it was first seen with) is stored once, however
+    many rows of price_tracking refer to it.
+    """
+    
+    def __init__(self, catalog_file: str = "item_catalog.json"):
+        self.catalog_file = catalog_file
+        self.names = []
+        if os.path.exists(catalog_file):
+            with open(catalog_file) as f:
+                self.names = json.load(f)
+        self.ids = {normalize_item_name(name): item_id for item_id, name in enumerate(self.names)}
+        self.changed = False
+    
+    def item_id(self, name: str) -> int:
+        """The id of an item name, adding it to the catalog when it is new"""
+        key = normalize_item_name(name)
+        item_id = self.ids.get(key)
+        if item_id is None:
+            item_id = self.ids[key] = len(self.names)
+            self.names.append(name)
+            self.changed = True
+        return item_id
+    
+    def item_ids(self, names: pd.Series) -> np.ndarray:
+        """Ids of a column of item names, looking up each distinct name once"""
+        codes, uniques = pd.factorize(names)
+        ids = np.fromiter((self.item_id(name) for name in uniques), dtype='int32', count=len(uniques))
+        return ids[codes]
+    
+    def item_names(self, ids: np.ndarray) -> np.ndarray:
+        return np.array(self.names, dtype=object)[ids]
+    
+    def digest(self, count: int) -> str:
+        """SHA-256 of the first count ids' normalized names, which identifies their id assignment"""
+        sha = hashlib.sha256()
+        for name in self.names[:count]:
+            sha.update(normalize_item_name(name).encode('utf-8') + b'\n')
+        return sha.hexdigest()
+    
+    def name_ranks(self) -> np.ndarray:
+        """Position of each id when the items are sorted by name"""
+        ranks = np.empty(len(self.names), dtype='int64')
+        ranks[np.argsort(np.array(self.names, dtype=object), kind='stable')] = np.arange(len(self.names))
+        return ranks
+    
+    def save(self):
+        """Write the catalog if items were added since it was loaded"""
+        if not self.changed:
+            return
+        tmp = f"{self.catalog_file}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.names, f, indent=0)
+        os.replace(tmp, self.catalog_file)
+        self.changed = False
+
+
+def day_number(value) -> int:
+    """Days since 1970-01-01 of a date, a datetime or a YYYY-MM-DD or MM/DD/YYYY string"""
+    if isinstance(value, str):
+        for date_format in ('%Y-%m-%d', DATE_FORMAT):
+            try:
+                value = datetime.strptime(value, date_format)
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError(f"Unrecognized date {value!r}; use YYYY-MM-DD or MM/DD/YYYY")
+    return value.toordinal() - UNIX_EPOCH_ORDINAL
+
+
+class PriceIndex:
+    """Point-in-time item prices from the price tracking history
+    
+    The observations are sorted by item id, then date, into flat day and price
+    arrays; offsets[item_id]:offsets[item_id + 1] is one item's slice, so the price
+    an item had on a date is found by bisecting that slice. Observations of an
+    item on the same date keep their price tracking order, and the last one wins.
+    The arrays are saved uncompressed with numpy, which loads in milliseconds;
+    item names are resolved through the item catalog.
+    """
+    
+    def __init__(self, offsets: np.ndarray, days: np.ndarray, prices: np.ndarray, catalog: ItemCatalog):
+        self.offsets = offsets
+        self.days = days
+        self.prices = prices
+        self.catalog = catalog
+        self._keys = None
+    
+    @classmethod
+    def from_price_tracking(cls, price_df: pd.DataFrame, catalog: ItemCatalog) -> PriceIndex:
+        """Index a price tracking table (item ids and parsed dates)"""
+        if len(price_df) == 0:
+            return cls(np.zeros(1, dtype='int64'), np.zeros(0, dtype='int32'), np.zeros(0, dtype='float64'),
+                       catalog)
+        item_ids = price_df['item_id'].to_numpy(dtype='int64')
+        days = price_df['date'].to_numpy().astype('datetime64[D]').astype('int32')
+        order = np.lexsort((days, item_ids))
+        item_count = max(len(catalog.names), int(item_ids.max()) + 1)
+        offsets = np.searchsorted(item_ids[order], np.arange(item_count + 1)).astype('int64')
+        return cls(offsets, days[order], price_df['price_per_item'].to_numpy(dtype='float64')[order], catalog)
+    
+    @classmethod
+    def load(cls, index_file: str, catalog: ItemCatalog) -> PriceIndex:
+        with np.load(index_file) as arrays:
+            return cls(arrays['offsets'], arrays['days'], arrays['prices'], catalog)
+    
+    def save(self, index_file: str):
+        tmp = f"{index_file}.tmp"
+        with open(tmp, 'wb') as f:
+            np.savez(f, offsets=self.offsets, days=self.days, prices=self.prices)
+        os.replace(tmp, index_file)
+    
+    def item_ids(self, item_names: Iterable[str]) -> np.ndarray:
+        """Catalog ids of item names, -1 for items that are not indexed"""
+        indexed = len(self.offsets) - 1
+        ids = (self.catalog.ids.get(normalize_item_name(name), -1) for name in item_names)
+        return np.fromiter((item_id if item_id < indexed else -1 for item_id in ids), dtype='int64')
+    
+    def price_as_of(self, item_name: str, on) -> Optional[float]:
+        """The item's price on a date: its last observed price on or before it (None if there is none)"""
+        item_id, = self.item_ids([item_name])
+        if item_id < 0:
+            return None
+        start, end = self.offsets[item_id], self.offsets[item_id + 1]
+        position = start + np.searchsorted(self.days[start:end], day_number(on), side='right')
+        return float(self.prices[position - 1]) if position > start else None
+    
+    def prices_as_of(self, queries: Iterable[Tuple[str, object]]) -> np.ndarray:
+        """Prices for a batch of (item name, date) pairs, NaN where there is no price
+        
+        All pairs are answered by one vectorized bisection over (item id, day) keys.
+        """
+        queries = list(queries)
+        item_ids = self.item_ids(name for name, _ in queries)
+        days = np.fromiter((day_number(on) for _, on in queries), dtype='int64', count=len(queries))
+        if len(self.prices) == 0:
+            return np.full(len(queries), np.nan)
+        if self._keys is None:
+            row_ids = np.repeat(np.arange(len(self.offsets) - 1), np.diff(self.offsets))
+            self._keys = (row_ids << 32) | (self.days.astype('int64') + 2**31)
+        
+        positions = np.searchsorted(self._keys, (item_ids << 32) | (days + 2**31), side='right') - 1
+        found = (item_ids >= 0) & (positions >= self.offsets[np.maximum(item_ids, 0)])
+        return np.where(found, self.prices[np.maximum(positions, 0)], np.nan)
+
+
+class PriceChangeState:
+    """Every item's last observed price, from which new price changes are found incrementally
+    
+    Indexed by item id: the day and price of the item's last observation in price
+    change order, how many observations it has and whether two of them share a
+    day but not a price. The state is only valid with the price changes file it
+    was saved after, so that file's name, size and mtime are recorded; a file
+    rewritten by anything else (a ledger run, another output format) makes the
+    next analysis start over. So does an item catalog whose ids were assigned
+    differently (a deleted and rebuilt item_catalog.json), detected by a digest
+    of the names of the ids the state covers.
+    """
+    
+    def __init__(self, days: np.ndarray, prices: np.ndarray, counts: np.ndarray, tied: np.ndarray,
+                 stamp: Tuple[str, ...] = (), catalog_digest: str = ''):
+        self.days = days
+        self.prices = prices
+        self.counts = counts
+        self.tied = tied
+        self.stamp = stamp
+        self.catalog_digest = catalog_digest
+    
+    @classmethod
+    def load(cls, state_file: str) -> Optional[PriceChangeState]:
+        if not os.path.exists(state_file):
+            return None
+        try:
+            with np.load(state_file) as arrays:
+                return cls(arrays['days'], arrays['prices'], arrays['counts'], arrays['tied'],
+                           tuple(arrays['stamp'].tolist()), str(arrays['catalog_digest']))
+        except (OSError, KeyError, ValueError):
+            return None
+    
+    @staticmethod
+    def file_stamp(changes_file: Optional[str]) -> Tuple[str, ...]:
+        if changes_file is None or not os.path.exists(changes_file):
+            return ('', '0', '0')
+        stat = os.stat(changes_file)
+        return (changes_file, str(stat.st_size), str(stat.st_mtime_ns))
+    
+    def matches(self, changes_file: Optional[str], catalog: ItemCatalog) -> bool:
+        return (self.stamp == self.file_stamp(changes_file) and len(self.counts) <= len(catalog.names) and
+                self.catalog_digest == catalog.digest(len(self.counts)))
+    
+    def resize(self, item_count: int):
+        """Make room for items added to the catalog since the state was saved"""
+        missing = item_count - len(self.counts)
+        if missing > 0:
+            self.days = np.concatenate([self.days, np.zeros(missing, dtype='int64')])
+            self.prices = np.concatenate([self.prices, np.zeros(missing, dtype='float64')])
+            self.counts = np.concatenate([self.counts, np.zeros(missing, dtype='int64')])
+            self.tied = np.concatenate([self.tied, np.zeros(missing, dtype=bool)])
+    
+    def save(self, state_file: str, changes_file: Optional[str], catalog: ItemCatalog):
+        """Save the state as matching the price changes file just written and the catalog"""
+        self.stamp = self.file_stamp(changes_file)
+        self.catalog_digest = catalog.digest(len(self.counts))
+        tmp = f"{state_file}.tmp"
+        with open(tmp, 'wb') as f:
+            np.savez(f, days=self.days, prices=self.prices, counts=self.counts, tied=self.tied,
+                     stamp=np.array(self.stamp), catalog_digest=np.array(self.catalog_digest))
+        os.replace(tmp, state_file)
+
+
+class DocumentManifest:
+    """Record of the PDFs whose rows are already in the output files.
+    
+    Each entry stores the file size, mtime and content hash. A file whose size and
+    mtime are unchanged is trusted without re-hashing; otherwise the hash decides,
+    so a touched but identical file is not re-parsed.
+    """
+    
+    def __init__(self, manifest_file: str = "processed_manifest.json"):
+        self.manifest_file = manifest_file
+        self.entries = {}
+        if os.path.exists(manifest_file):
+            with open(manifest_file) as f:
+                self.entries = json.load(f)
+    
+    def exists(self) -> bool:
+        return os.path.exists(self.manifest_file)
+    
+    def fingerprint(self, pdf_path: str, kind: str) -> Dict:
+        stat = os.stat(pdf_path)
+        return {
+            'kind': kind,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': file_sha256(pdf_path)
+        }
+    
+    def changed_files(self, pdf_files: Iterable[Path]) -> List[Path]:
+        """Return the files that are new or whose content differs from the manifest"""
+        changed = []
+        for pdf_file in pdf_files:
+            entry = self.entries.get(str(pdf_file))
+            if entry:
+                stat = pdf_file.stat()
+                if stat.st_size == entry['size'] and stat.st_mtime_ns == entry['mtime_ns']:
+                    continue
+                if stat.st_size == entry['size'] and file_sha256(str(pdf_file)) == entry['sha256']:
+                    entry['mtime_ns'] = stat.st_mtime_ns  # Touched but identical
+                    continue
+            changed.append(pdf_file)
+        return changed
+    
+    def removed_files(self, pdf_files: Iterable[Path], kind: str) -> List[str]:
+        """Return manifest entries of the given kind that are no longer on disk"""
+        present = {str(pdf_file) for pdf_file in pdf_files}
+        return [path for path, entry in self.entries.items()
+                if entry['kind'] == kind and path not in present]
+    
+    def record(self, pdf_path: str, kind: str):
+        self.entries[pdf_path] = self.fingerprint(pdf_path, kind)
+    
+    def forget(self, pdf_path: str):
+        self.entries.pop(pdf_path, None)
+    
+    def save(self):
+        tmp = f"{self.manifest_file}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.entries, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.manifest_file)
+
+
+class PriceLedger:
+    """SQLite store of parsed documents, their line items and price observations.
+    
+    Documents are keyed by the SHA-256 of their PDF, so storing a document again
+    replaces its rows. Price observations (line items with a valid date) carry the
+    item's catalog key (normalize_item_name) and are indexed on (item_key, date),
+    which lets price tracking, price change analysis and single-item history run
+    as indexed queries that group items as the item catalog does.
+    """
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS documents (
+            document_hash TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            file_name TEXT NOT NULL,
+            document_number TEXT NOT NULL,
+            date TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_documents_number ON documents (document_number);
+        CREATE INDEX IF NOT EXISTS idx_documents_file ON documents (kind, file_name);
+        
+        CREATE TABLE IF NOT EXISTS line_items (
+            document_hash TEXT NOT NULL REFERENCES documents ON DELETE CASCADE,
+            line_number INTEGER NOT NULL,
+            item_name TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            rate_per_item REAL NOT NULL,
+            total_amount REAL NOT NULL,
+            PRIMARY KEY (document_hash, line_number)
+        );
+        
+        CREATE TABLE IF NOT EXISTS price_observations (
+            document_hash TEXT NOT NULL REFERENCES documents ON DELETE CASCADE,
+            line_number INTEGER NOT NULL,
+            item_name TEXT NOT NULL,
+            date TEXT NOT NULL,  -- ISO date, so text order is date order
+            price_per_item REAL NOT NULL,
+            item_key TEXT NOT NULL,  -- normalize_item_name(item_name)
+            PRIMARY KEY (document_hash, line_number)
+        );
+        CREATE INDEX IF NOT EXISTS idx_price_observations_key_date ON price_observations (item_key, date);
+    """
+    
+    # Same-date observations of an item keep the order of combined_items.csv
+    DOCUMENT_ORDER = "d.kind, d.file_name, o.line_number"
+    
+    def __init__(self, db_file: str = "price_ledger.db"):
+        import sqlite3
+        
+        self.db_file = db_file
+        self.connection = sqlite3.connect(db_file)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.create_function('normalize_item_name', 1, normalize_item_name, deterministic=True)
+        self.add_item_keys()
+        self.connection.executescript(self.SCHEMA)
+    
+    def add_item_keys(self):
+        """Key the price observations of a ledger written before they had item keys"""
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(price_observations)")]
+        if columns and 'item_key' not in columns:
+            with self.connection:
+                self.connection.execute(
+                    "ALTER TABLE price_observations ADD COLUMN item_key TEXT NOT NULL DEFAULT ''")
+                self.connection.execute("UPDATE price_observations SET item_key = normalize_item_name(item_name)")
+                self.connection.execute("DROP INDEX IF EXISTS idx_price_observations_item_date")
+    
+    def close(self):
+        self.connection.close()
+    
+    def has_documents(self, document_hashes: Iterable[str]) -> bool:
+        """Check that every hash is already stored"""
+        hashes = set(document_hashes)
+        if not hashes:
+            return True
+        with self.connection:
+            self.load_hashes(hashes)
+            (stored,), = self.connection.execute(
+                "SELECT COUNT(*) FROM documents WHERE document_hash IN (SELECT document_hash FROM kept_hashes)")
+        return stored == len(hashes)
+    
+    def load_hashes(self, hashes: Set[str]):
+        self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS kept_hashes (document_hash TEXT PRIMARY KEY)")
+        self.connection.execute("DELETE FROM kept_hashes")
+        self.connection.executemany("INSERT OR IGNORE INTO kept_hashes VALUES (?)", ((h,) for h in hashes))
+    
+    def store(self, documents: List[InvoiceDocument | ReceiptDocument], kind: str,
+              document_hashes: Dict[str, str]):
+        """Upsert parsed documents; document_hashes maps file names to PDF hashes"""
+        number_key = 'invoice_number' if kind == 'invoice' else 'receipt_number'
+        with self.connection:
+            for document in documents:
+                document_hash = document_hashes[document.file_name]
+                # A file whose content changed leaves its old version behind
+                self.connection.execute(
+                    "DELETE FROM documents WHERE kind = ? AND file_name = ? AND document_hash != ?",
+                    (kind, document.file_name, document_hash))
+                self.connection.execute(
+                    "INSERT INTO documents VALUES (?, ?, ?, ?, ?) ON CONFLICT (document_hash) DO UPDATE SET "
+                    "kind = excluded.kind, file_name = excluded.file_name, "
+                    "document_number = excluded.document_number, date = excluded.date",
+                    (document_hash, kind, document.file_name, getattr(document, number_key), document.date))
+                self.connection.execute("DELETE FROM line_items WHERE document_hash = ?", (document_hash,))
+                self.connection.execute("DELETE FROM price_observations WHERE document_hash = ?", (document_hash,))
+                
+                items = document.items
+                self.connection.executemany(
+                    "INSERT INTO line_items VALUES (?, ?, ?, ?, ?, ?)",
+                    ((document_hash, line) + item for line, item in enumerate(items)))
+                
+                try:
+                    iso_date = datetime.strptime(document.date, DATE_FORMAT).strftime('%Y-%m-%d')
+                except ValueError:
+                    continue  # No valid date, so no price observations, as in price tracking
+                self.connection.executemany(
+                    "INSERT INTO price_observations "
+                    "(document_hash, line_number, item_name, date, price_per_item, item_key) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    ((document_hash, line, item.description, iso_date, item.rate,
+                      normalize_item_name(item.description))
+                     for line, item in enumerate(items)))
+    
+    def prune(self, document_hashes: Iterable[str]):
+        """Delete every document (and its rows) whose hash is not in document_hashes"""
+        with self.connection:
+            self.load_hashes(set(document_hashes))
+            self.connection.execute(
+                "DELETE FROM documents WHERE document_hash NOT IN (SELECT document_hash FROM kept_hashes)")
+    
+    def price_tracking(self) -> pd.DataFrame:
+        """All price observations in price_tracking order, with the documents' own date text"""
+        return pd.read_sql_query(
+            "SELECT d.date, o.item_name, o.price_per_item, d.document_number, d.kind AS document_type "
+            "FROM price_observations o JOIN documents d USING (document_hash) "
+            f"ORDER BY o.item_key, o.date, {self.DOCUMENT_ORDER}", self.connection)
+    
+    def item_history(self, item_name: str) -> pd.DataFrame:
+        """One item's prices in date order, under any spelling, from the (item_key, date) index"""
+        return pd.read_sql_query(
+            "SELECT o.date, o.price_per_item, d.document_number, d.kind AS document_type, d.file_name "
+            "FROM price_observations o JOIN documents d USING (document_hash) "
+            f"WHERE o.item_key = ? ORDER BY o.date, {self.DOCUMENT_ORDER}", self.connection,
+            params=(normalize_item_name(item_name),), parse_dates=['date'])
+    
+    @staticmethod
+    def format_iso_dates(dates: pd.Series) -> pd.Series:
+        return pd.to_datetime(dates, format='%Y-%m-%d').dt.strftime(DATE_FORMAT)
+    
+    def price_changes(self, catalog: ItemCatalog, item_name: str) -> pd.DataFrame:
+        """One item's consecutive price changes, as in price_changes.csv
+        
+        The item's observations come from the (item_key, date) index. Observations on
+        one date are compared in the order numpy's quicksort puts them, as
+        find_price_changes does, so the rows match the item's rows in the full
+        analysis (which the analyze stage runs over price_tracking()).
+        """
+        rows = pd.read_sql_query(
+            "SELECT o.item_name, o.date, o.price_per_item "
+            "FROM price_observations o JOIN documents d USING (document_hash) "
+            f"WHERE o.item_key = ? ORDER BY o.date, {self.DOCUMENT_ORDER}", self.connection,
+            params=(normalize_item_name(item_name),))
+        dates = pd.to_datetime(rows['date'], format='%Y-%m-%d').to_numpy()
+        order = np.argsort(dates, kind='quicksort')
+        prices = rows['price_per_item'].to_numpy(dtype='float64')[order]
+        
+        current = np.flatnonzero(prices[1:] != prices[:-1]) + 1
+        previous = current - 1
+        prev_price = prices[previous]
+        curr_price = prices[current]
+        iso_dates = rows['date'].to_numpy()[order]
+        return pd.DataFrame({
+            'item_name': catalog.item_names(catalog.item_ids(rows['item_name']))[order][current],
+            'previous_date': convert_distinct(pd.Series(iso_dates[previous]), self.format_iso_dates),
+            'current_date': convert_distinct(pd.Series(iso_dates[current]), self.format_iso_dates),
+            'previous_price': prev_price,
+            'current_price': curr_price,
+            'price_change': curr_price - prev_price,
+            'percentage_change': np.round(((curr_price - prev_price) / prev_price) * 100, 2)
+        }, columns=PRICE_CHANGE_COLUMNS)
+
+
+class DirectoryWatcher:
+    """Wait for PDFs to be added, rewritten or removed in a set of directories.
+    
+    On Linux the directories are watched with inotify (through ctypes), which reports
+    a PDF once it is closed after writing or moved into place. Elsewhere, or when
+    inotify is unavailable, the directory listings are polled every poll_interval
+    seconds and a PDF is reported once its size and mtime have held for one poll,
+    so a half-copied file is not picked up.
+    """
+    
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_DELETE = 0x200
+    IN_Q_OVERFLOW = 0x4000
+    EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, name length
+    
+    def __init__(self, directories: Iterable[Path], poll_interval: float = 0.5):
+        self.directories = [Path(directory) for directory in directories]
+        self.poll_interval = poll_interval
+        self.watches = {}
+        self.fd = self.open_inotify()
+        self.listing = self.list_pdfs() if self.fd is None else {}
+        self.unsettled = {}
+    
+    @property
+    def mode(self) -> str:
+        return 'inotify' if self.fd is not None else 'polling'
+    
+    def open_inotify(self) -> Optional[int]:
+        """An inotify descriptor watching every directory, or None when inotify is unavailable"""
+        if not sys.platform.startswith('linux'):
+            return None
+        import ctypes
+        import ctypes.util
+        
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            return None
+        
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_FROM | self.IN_MOVED_TO | self.IN_DELETE
+        for directory in self.directories:
+            wd = libc.inotify_add_watch(fd, os.fsencode(directory), mask)
+            if wd < 0:
+                os.close(fd)
+                return None
+            self.watches[wd] = directory
+        return fd
+    
+    def list_pdfs(self) -> Dict[str, Tuple[int, int]]:
+        listing = {}
+        for directory in self.directories:
+            for path in directory.glob("*.pdf"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue  # Removed while listing
+                listing[str(path)] = (stat.st_size, stat.st_mtime_ns)
+        return listing
+    
+    def wait(self, timeout: float = None) -> Set[str]:
+        """Block until PDFs change or timeout seconds pass, and return the changed paths"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            changed = self.read_events(remaining) if self.fd is not None else self.poll(remaining)
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+    
+    def read_events(self, timeout: Optional[float]) -> Set[str]:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        
+        data = os.read(self.fd, 64 * 1024)
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = self.EVENT_HEADER.unpack_from(data, offset)
+            offset += self.EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            if mask & self.IN_Q_OVERFLOW:
+                # Events were dropped; the caller rescans the directories anyway
+                changed.update(str(directory) for directory in self.directories)
+            elif name.endswith('.pdf'):
+                changed.add(str(self.watches[wd] / name))
+        return changed
+    
+    def poll(self, timeout: Optional[float]) -> Set[str]:
+        time.sleep(self.poll_interval if timeout is None else min(self.poll_interval, timeout))
+        listing = self.list_pdfs()
+        changed = set()
+        for path in set(listing) | set(self.listing):
+            current = listing.get(path)
+            if current == self.listing.get(path):
+                self.unsettled.pop(path, None)
+                continue
+            if current is not None and self.unsettled.get(path) != current:
+                self.unsettled[path] = current  # New or still being written; wait one more poll
+                continue
+            self.unsettled.pop(path, None)
+            if current is None:
+                del self.listing[path]
+            else:
+                self.listing[path] = current
+            changed.add(path)
+        return changed
+    
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+def start_pool_worker():
+    """Warm a long-lived pool worker: import what parsing needs and leave Ctrl-C to the parent"""
+    import signal
+    
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    importlib.import_module('pdfplumber')
+
 
 class InvoiceProcessor:
-    def __init__(self, invoice_dir: str = "Invoices", receipts_dir: str = None):
+    def __init__(self, invoice_dir: str = "Invoices", receipts_dir: str = None, workers: int = 1,
+                 text_cache: TextCache = None, stream_pages: bool = True, use_sibling_csvs: bool = True,
+                 metrics: PipelineMetrics = None, output_format: str = 'csv', ledger: PriceLedger = None,
+                 force_report: bool = False):
         self.invoice_dir = Path(invoice_dir)
         self.receipts_dir = Path(receipts_dir) if receipts_dir else None
-        self.items_file = "invoice_items.csv"
-        self.receipt_items_file = "receipt_items.csv"
-        self.combined_items_file = "combined_items.csv"
-        self.price_tracking_file = "price_tracking.csv"
+        self.workers = max(1, workers)
+        self.text_cache = text_cache
+        self.stream_pages = stream_pages
+        self.use_sibling_csvs = use_sibling_csvs
+        self.metrics = metrics
+        self.ledger = ledger
+        self.force_report = force_report
+        self.pool = None
+        self.catalog = None
+        suffix = OUTPUT_FORMATS[output_format]
+        self.items_file = f"invoice_items{suffix}"
+        self.receipt_items_file = f"receipt_items{suffix}"
+        self.combined_items_file = f"combined_items{suffix}"
+        self.price_tracking_file = f"price_tracking{suffix}"
+        self.price_changes_file = f"price_changes{suffix}"
+        self.manifest_file = "processed_manifest.json"
+        self.catalog_file = "item_catalog.json"
+        self.price_index_file = "price_index.npz"
+        self.price_state_file = "price_state.npz"
+        self.report_file = "price_increase_report.pdf"
+        self.report_digest_file = "price_increase_report.digest.json"
+    
+    def __getstate__(self):
+        # Worker processes get a copy of the processor; metrics, the ledger, the pool and the catalog
+        # stay in the parent
+        state = self.__dict__.copy()
+        state['metrics'] = None
+        state['ledger'] = None
+        state['pool'] = None
+        state['catalog'] = None
+        return state
+    
+    def item_catalog(self) -> ItemCatalog:
+        """The item catalog, loaded on first use"""
+        if self.catalog is None:
+            self.catalog = ItemCatalog(self.catalog_file)
+        return self.catalog
+    
+    def measure(self, stage: str):
+        """Context manager recording a stage in the metrics, if they are enabled"""
+        return self.metrics.stage(stage) if self.metrics else nullcontext()
+    
+    def iter_pdf_pages(self, pdf_path: str) -> Iterator[str]:
+        """Yield the text of each PDF page, using the text cache when one is configured
         
+        Pages are only laid out as the caller asks for them. If the caller stops
+        early, the pages read so far are cached as a partial entry and a later read
+        resumes from the first page that was never extracted.
+        """
+        cached_pages, complete = [], False
+        if self.text_cache:
+            cache_key = self.text_cache.key_for(pdf_path)
+            cached = self.text_cache.get(cache_key)
+            if cached is not None:
+                cached_pages, complete = cached
+        
+        yield from cached_pages
+        if complete:
+            return
+        
+        pages = list(cached_pages)
+        try:
+            with pdfplumber.open(pdf_path) as pdf:
+                for page in pdf.pages[len(pages):]:
+                    pages.append(page.extract_text())
+                    yield pages[-1]
+        except GeneratorExit:
+            if self.text_cache and len(pages) > len(cached_pages):
+                self.text_cache.put(cache_key, pages, complete=False)
+            raise
+        
+        if self.text_cache:
+            self.text_cache.put(cache_key, pages, complete=True)
+    
+    def iter_pdf_lines(self, pdf_path: str) -> Iterator[str]:
+        """Yield the text lines of a PDF page by page"""
+        for page_text in self.iter_pdf_pages(pdf_path):
+            yield from page_text.split('\n')
+    
     def extract_text_from_pdf(self, pdf_path: str) -> str:
         """Extract text from PDF file"""
-        with pdfplumber.open(pdf_path) as pdf:
-            text = ""
-            for page in pdf.pages:
-                text += page.extract_text() + "\n"
-        return text
+        return "".join(page_text + "\n" for page_text in self.iter_pdf_pages(pdf_path))
     
     def parse_invoice_date(self, text: str) -> str:
         """Extract invoice date from PDF text"""
-        date_match = re.search(r'DATE\s+(\d{2}/\d{2}/\d{4})', text)
+        date_match = INVOICE_DATE_RE.search(text)
         if date_match:
             return date_match.group(1)
         return ""
     
     def parse_invoice_number(self, text: str) -> str:
         """Extract invoice number from PDF text"""
-        invoice_match = re.search(r'INVOICE\s+(\d+)', text)
+        invoice_match = INVOICE_NUMBER_RE.search(text)
         if invoice_match:
             return invoice_match.group(1)
         return ""
     
-    def parse_line_items(self, text: str) -> List[Dict]:
+    def parse_line_items(self, text: str) -> LineItemColumns:
         """Extract line items from invoice text"""
-        items = []
-        
-        # Find the section with items (between DESCRIPTION and VERIFIED/EMAILED)
-        lines = text.split('\n')
+        return self.parse_invoice_lines(text.split('\n')).items
+    
+    def parse_invoice_lines(self, lines: Iterable[str], stop_at_totals: bool = False) -> InvoiceDocument:
+        """Collect the invoice number, date and line items in a single pass over the text lines
+        
+        Gives the same results as parse_invoice_number, parse_invoice_date and
+        parse_line_items on the joined text. The file name is left empty for the
+        caller to fill in. With stop_at_totals the pass ends at the
+        'TOTAL DUE' line once the number and date have been seen, so a streaming
+        source never has to produce the pages after the totals block.
+        """
+        invoice_number = date = ""
+        number_pending = date_pending = False
+        items = LineItemColumns()
         in_items_section = False
         
         for line in lines:
+            # Header fields, until each one has been found
+            if not invoice_number:
+                invoice_number, number_pending = scan_header_field(
+                    line, 'INVOICE', INVOICE_NUMBER_RE, INVOICE_NUMBER_CONTINUATION_RE, number_pending)
+            if not date:
+                date, date_pending = scan_header_field(
+                    line, 'DATE', INVOICE_DATE_RE, INVOICE_DATE_CONTINUATION_RE, date_pending)
+            
             line = line.strip()
             
             # Start capturing items after the header
@@ -73,103 +1294,190 @@ class InvoiceProcessor:
             # Stop at payment/total section
             if 'VERIFIED' in line or 'TOTAL DUE' in line or 'PAYMENT' in line:
                 in_items_section = False
+                if stop_at_totals and 'TOTAL DUE' in line and invoice_number and date:
+                    break
                 continue
             
             if not in_items_section or not line:
                 continue
             
             # Parse item line - format: DESCRIPTION QTY RATE AMOUNT
-            # Use regex to capture the components
-            item_match = re.match(r'^(.+?)\s+(\d+)\s+([\d.]+)\s+([\d.]+)$', line)
+            fields = split_item_line(line, 3)
             
-            if item_match:
-                description = item_match.group(1).strip()
+            if fields:
+                description = fields[0]
                 
                 # Filter out unwanted items containing these terms
-                skip_terms = ['BILL TO', 'SHIP TO', 'INVOICE']
-                if any(term in description.upper() for term in skip_terms):
+                upper_description = description.upper()
+                if any(term in upper_description for term in INVOICE_SKIP_TERMS):
                     continue
                 
-                quantity = int(item_match.group(2))
-                rate = float(item_match.group(3))
-                amount = float(item_match.group(4))
+                quantity = int(fields[1])
+                rate = float(fields[2])
+                amount = float(fields[3])
                 
-                items.append({
-                    'description': description,
-                    'quantity': quantity,
-                    'rate': rate,
-                    'amount': amount
-                })
+                items.append(description, quantity, rate, amount)
         
-        return items
+        return InvoiceDocument("", invoice_number, date, items)
     
-    def process_single_invoice(self, pdf_path: str) -> Dict:
-        """Process a single PDF invoice"""
-        print(f"Processing: {pdf_path}")
+    def process_single_invoice(self, pdf_path: str) -> InvoiceDocument:
+        """Process a single PDF invoice
         
-        text = self.extract_text_from_pdf(pdf_path)
+        In streaming mode the parser reads lines as pages are laid out and stops at
+        the totals block, so pages after it (terms, remittance slips) are never
+        extracted.
+        """
+        print(f"Processing: {pdf_path}")
         
-        invoice_data = {
-            'file_name': os.path.basename(pdf_path),
-            'invoice_number': self.parse_invoice_number(text),
-            'date': self.parse_invoice_date(text),
-            'items': self.parse_line_items(text)
-        }
+        if self.stream_pages:
+            with closing(self.iter_pdf_lines(pdf_path)) as lines:
+                parsed = self.parse_invoice_lines(lines, stop_at_totals=True)
+        else:
+            parsed = self.parse_invoice_lines(self.extract_text_from_pdf(pdf_path).split('\n'))
         
-        return invoice_data
+        return parsed._replace(file_name=os.path.basename(pdf_path))
     
-    def process_all_invoices(self) -> List[Dict]:
-        """Process all PDF invoices in the directory"""
-        invoices = []
+    def process_files(self, pdf_files: List[Path], process_func: Callable[[str], object]) -> List:
+        """Run process_func over pdf_files, fanning out to a process pool when workers > 1.
+        
+        Results are returned in the order of pdf_files; files that fail are reported
+        and skipped, exactly as in the sequential path. The pool started by
+        start_worker_pool is reused when there is one.
+        """
+        results = []
+        
+        if self.workers == 1 or len(pdf_files) < 2:
+            for pdf_file in pdf_files:
+                try:
+                    result, elapsed = timed_call(process_func, str(pdf_file))
+                except Exception as e:
+                    print(f"Error processing {pdf_file}: {e}")
+                    continue
+                results.append(result)
+                if self.metrics:
+                    self.metrics.record_latency(elapsed)
+            return results
         
+        from concurrent.futures import ProcessPoolExecutor
+        
+        if self.pool:
+            pool = nullcontext(self.pool)
+        else:
+            pool = ProcessPoolExecutor(max_workers=min(self.workers, len(pdf_files)))
+        with pool as executor:
+            futures = [executor.submit(timed_call, process_func, str(pdf_file)) for pdf_file in pdf_files]
+            for pdf_file, future in zip(pdf_files, futures):
+                try:
+                    result, elapsed = future.result()
+                except Exception as e:
+                    print(f"Error processing {pdf_file}: {e}")
+                    continue
+                results.append(result)
+                if self.metrics:
+                    self.metrics.record_latency(elapsed)
+        
+        return results
+    
+    def find_invoice_files(self) -> List[Path]:
+        """List the invoice PDFs in processing order"""
         pdf_files = list(self.invoice_dir.glob("*.pdf"))
         pdf_files.sort()  # Process in order
+        return pdf_files
+    
+    def sibling_csv_paths(self, pdf_name: str) -> Tuple[str, str]:
+        """Return the individual CSV and its metadata sidecar for an invoice PDF"""
+        csv_path = os.path.join(self.invoice_dir, pdf_name.replace('.pdf', '.csv'))
+        meta_path = os.path.join(self.invoice_dir, pdf_name.replace('.pdf', '.meta.json'))
+        return csv_path, meta_path
+    
+    def fresh_sibling_meta(self, pdf_path: str) -> Optional[Dict]:
+        """Return the sidecar of the individual CSV if it was written from this PDF
+        
+        The sidecar records the PDF's size and SHA-256; the CSV is only trusted when
+        both still match and it was written by the current parser version.
+        Modification times are not compared, as copies that keep them (cp -p,
+        rsync -a, unzipping) can replace a PDF with an older-looking file.
+        """
+        csv_path, meta_path = self.sibling_csv_paths(os.path.basename(pdf_path))
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if (not os.path.exists(csv_path) or meta.get('parser_version') != INVOICE_PARSER_VERSION or
+                    meta.get('pdf_size') != os.stat(pdf_path).st_size or
+                    meta.get('pdf_sha256') != file_sha256(pdf_path)):
+                return None
+        except (OSError, ValueError):
+            return None
+        return meta
+    
+    def load_invoice_from_csv(self, pdf_path: str) -> Optional[InvoiceDocument]:
+        """Load a previously parsed invoice from its individual CSV instead of the PDF
+        
+        Returns None when the CSV is missing, was written from another version of
+        the PDF or by another parser version, or does not have the expected columns.
+        """
+        meta = self.fresh_sibling_meta(pdf_path)
+        if meta is None:
+            return None
+        
+        pdf_name = os.path.basename(pdf_path)
+        csv_path, _ = self.sibling_csv_paths(pdf_name)
+        try:
+            items = LineItemColumns()
+            with open(csv_path, newline='') as f:
+                reader = csv.DictReader(f)
+                if reader.fieldnames != INDIVIDUAL_CSV_COLUMNS:
+                    return None
+                for row in reader:
+                    items.append(row['item_name'], int(row['quantity']), float(row['rate_per_item']),
+                                 float(row['total_amount']))
+        except (OSError, ValueError, KeyError):
+            return None
+        
+        return InvoiceDocument(pdf_name, meta['invoice_number'], meta['date'], items)
+    
+    def process_all_invoices(self, pdf_files: List[Path] = None) -> List[InvoiceDocument]:
+        """Process all PDF invoices in the directory, or just pdf_files when given
+        
+        Invoices with an up-to-date individual CSV are loaded from it; only the
+        rest are extracted from the PDF.
+        """
+        if pdf_files is None:
+            pdf_files = self.find_invoice_files()
+        
+        from_csv = {}
+        if self.use_sibling_csvs:
+            for pdf_file in pdf_files:
+                invoice_data = self.load_invoice_from_csv(str(pdf_file))
+                if invoice_data is not None:
+                    from_csv[pdf_file] = invoice_data
+            if from_csv:
+                print(f"Loaded {len(from_csv)} invoices from their individual CSV files")
+        
+        to_parse = [pdf_file for pdf_file in pdf_files if pdf_file not in from_csv]
+        parsed = {invoice.file_name: invoice
+                  for invoice in self.process_files(to_parse, self.process_single_invoice)}
         
+        invoices = []
         for pdf_file in pdf_files:
-            try:
-                invoice_data = self.process_single_invoice(str(pdf_file))
+            invoice_data = from_csv.get(pdf_file) or parsed.get(pdf_file.name)
+            if invoice_data is not None:
                 invoices.append(invoice_data)
-            except Exception as e:
-                print(f"Error processing {pdf_file}: {e}")
-        
         return invoices
     
     def parse_receipt_date(self, text: str) -> str:
         """Extract receipt date from PDF text - more flexible date patterns"""
-        # Try various date formats common in receipts
-        date_patterns = [
-            r'DATE\s+(\d{2}/\d{2}/\d{4})',  # DATE MM/DD/YYYY
-            r'Date:\s*(\d{2}/\d{2}/\d{4})',  # Date: MM/DD/YYYY
-            r'(\d{2}/\d{2}/\d{4})',  # Just MM/DD/YYYY
-            r'(\d{1,2}/\d{1,2}/\d{4})',  # M/D/YYYY or MM/D/YYYY
-            r'(\d{2}-\d{2}-\d{4})',  # MM-DD-YYYY
-        ]
-        
-        for pattern in date_patterns:
-            date_match = re.search(pattern, text)
-            if date_match:
-                return date_match.group(1)
-        return ""
+        # Try various date formats common in receipts, in RECEIPT_DATE_PATTERN order
+        return RECEIPT_DATE_PATTERN.search(text)
     
     def parse_receipt_number(self, text: str) -> str:
         """Extract receipt/reference number from PDF text"""
-        # Try various receipt number patterns
-        receipt_patterns = [
-            r'RECEIPT\s+(\d+)',  # RECEIPT 12345
-            r'Receipt\s*#?\s*(\d+)',  # Receipt #12345 or Receipt 12345
-            r'REF\s*#?\s*(\d+)',  # REF #12345
-            r'Reference\s*#?\s*(\d+)',  # Reference #12345
-        ]
-        
-        for pattern in receipt_patterns:
-            receipt_match = re.search(pattern, text)
-            if receipt_match:
-                return receipt_match.group(1)
-        return ""
+        # Try various receipt number patterns, in RECEIPT_NUMBER_PATTERN order
+        return RECEIPT_NUMBER_PATTERN.search(text)
     
-    def parse_receipt_items(self, text: str) -> List[Dict]:
+    def parse_receipt_items(self, text: str) -> LineItemColumns:
         """Extract line items from receipt text - more flexible parsing"""
-        items = []
+        items = LineItemColumns()
         lines = text.split('\n')
         
         # Look for item patterns - receipts often have different formats
@@ -180,260 +1488,436 @@ class InvoiceProcessor:
             
             # Pattern 1: Item name followed by quantity and price
             # e.g., "BASMATI RICE 5LB 2 12.99"
-            item_match1 = re.match(r'^(.+?)\s+(\d+)\s+([\d.]+)$', line)
-            if item_match1:
-                description = item_match1.group(1).strip()
+            fields = split_item_line(line, 2)
+            if fields:
+                description = fields[0]
                 
                 # Filter out unwanted items containing these terms
-                skip_terms = ['BILL TO', 'SHIP TO', 'INVOICE']
-                if any(term in description.upper() for term in skip_terms):
+                upper_description = description.upper()
+                if any(term in upper_description for term in INVOICE_SKIP_TERMS):
                     continue
                 
-                quantity = int(item_match1.group(2))
-                amount = float(item_match1.group(3))
+                quantity = int(fields[1])
+                amount = float(fields[2])
                 rate = amount / quantity if quantity > 0 else amount
                 
-                items.append({
-                    'description': description,
-                    'quantity': quantity,
-                    'rate': rate,
-                    'amount': amount
-                })
+                items.append(description, quantity, rate, amount)
                 continue
             
             # Pattern 2: Item name with just total amount
             # e.g., "TURMERIC POWDER 8.99"
-            item_match2 = re.match(r'^(.+?)\s+([\d.]+)$', line)
-            if item_match2 and len(item_match2.group(1)) > 3:  # Avoid matching short codes
-                description = item_match2.group(1).strip()
-                amount = float(item_match2.group(2))
+            fields = split_item_line(line, 1)
+            if fields and len(fields[0]) > 3:  # Avoid matching short codes
+                description = fields[0]
+                amount = float(fields[1])
                 
                 # Skip lines that look like totals, tax, etc.
-                skip_terms = ['TOTAL', 'TAX', 'SUBTOTAL', 'PAYMENT', 'CHANGE', 'CASH', 'CREDIT', 'BILL TO', 'SHIP TO', 'INVOICE']
-                if not any(term in description.upper() for term in skip_terms):
-                    items.append({
-                        'description': description,
-                        'quantity': 1,
-                        'rate': amount,
-                        'amount': amount
-                    })
+                upper_description = description.upper()
+                if not any(term in upper_description for term in RECEIPT_TOTAL_TERMS):
+                    items.append(description, 1, amount, amount)
         
         return items
     
-    def process_single_receipt(self, pdf_path: str) -> Dict:
+    def process_single_receipt(self, pdf_path: str) -> ReceiptDocument:
         """Process a single PDF receipt"""
         print(f"Processing receipt: {pdf_path}")
         
         text = self.extract_text_from_pdf(pdf_path)
         
-        receipt_data = {
-            'file_name': os.path.basename(pdf_path),
-            'receipt_number': self.parse_receipt_number(text),
-            'date': self.parse_receipt_date(text),
-            'items': self.parse_receipt_items(text),
-            'type': 'receipt'
-        }
-        
-        return receipt_data
+        return ReceiptDocument(
+            file_name=os.path.basename(pdf_path),
+            receipt_number=self.parse_receipt_number(text),
+            date=self.parse_receipt_date(text),
+            items=self.parse_receipt_items(text)
+        )
     
-    def process_all_receipts(self) -> List[Dict]:
-        """Process all PDF receipts in the receipts directory"""
+    def find_receipt_files(self) -> List[Path]:
+        """List the receipt PDFs in processing order"""
         if not self.receipts_dir or not self.receipts_dir.exists():
-            print("No receipts directory specified or found.")
             return []
-        
-        receipts = []
         pdf_files = list(self.receipts_dir.glob("*.pdf"))
         pdf_files.sort()  # Process in order
+        return pdf_files
+    
+    def process_all_receipts(self, pdf_files: List[Path] = None) -> List[ReceiptDocument]:
+        """Process all PDF receipts in the receipts directory, or just pdf_files when given"""
+        if not self.receipts_dir or not self.receipts_dir.exists():
+            print("No receipts directory specified or found.")
+            return []
+        
+        if pdf_files is None:
+            pdf_files = self.find_receipt_files()
         
         print(f"Found {len(pdf_files)} receipt files to process")
         
-        for pdf_file in pdf_files:
-            try:
-                receipt_data = self.process_single_receipt(str(pdf_file))
-                receipts.append(receipt_data)
-            except Exception as e:
-                print(f"Error processing {pdf_file}: {e}")
+        return self.process_files(pdf_files, self.process_single_receipt)
+    
+    def read_output_table(self, output_file: str) -> Optional[pd.DataFrame]:
+        """Read back a saved item or price table in any output format (None when missing)
         
-        return receipts
+        Text columns stay text (invoice numbers keep leading zeros, an item called NA
+        stays NA) and floats are parsed exactly as they were written.
+        """
+        table_file = find_table(output_file)
+        if table_file is None:
+            return None
+        
+        try:
+            return read_table(table_file, dtype={column: str for column in TEXT_COLUMNS},
+                              keep_default_na=False, float_precision='round_trip')
+        except pd.errors.EmptyDataError:
+            return pd.DataFrame()
+    
+    def merge_with_existing(self, output_file: str, df: pd.DataFrame, replaced_files: Set[str],
+                            sort_columns: List[str]) -> pd.DataFrame:
+        """Merge freshly parsed rows into an existing output file (incremental runs).
+        
+        Rows from replaced_files are dropped from the existing file before the new rows
+        are appended, then everything is put back in full-run order. The existing file
+        may be in another output format than the one being written.
+        """
+        existing = self.read_output_table(output_file)
+        if existing is None or len(existing.columns) == 0:
+            return df
+        
+        existing = existing[~existing['file_name'].isin(replaced_files)]
+        merged = pd.concat([existing, df], ignore_index=True)
+        return merged.sort_values(sort_columns, kind='stable', ignore_index=True)
+    
+    def build_line_items(self, invoices: List[InvoiceDocument], receipts: List[ReceiptDocument]) -> pd.DataFrame:
+        """Flatten invoices and receipts into one line-item table, invoices first
+        
+        The table has the combined_items.csv columns; every output file is a projection
+        of it (see project_line_items). Each document's item columns are appended to
+        one LineItemColumns, whose arrays the table's numeric columns are built on
+        without a copy; the document columns are repeated per item by NumPy.
+        """
+        items = LineItemColumns()
+        document_columns = {'document_number': [], 'date': [], 'file_name': [], 'type': []}
+        counts = []
+        for documents, number_key, kind in ((invoices, 'invoice_number', 'invoice'),
+                                            (receipts, 'receipt_number', 'receipt')):
+            for document in documents:
+                items.extend(document.items)
+                counts.append(len(document.items))
+                document_columns['document_number'].append(getattr(document, number_key))
+                document_columns['date'].append(document.date)
+                document_columns['file_name'].append(document.file_name)
+                document_columns['type'].append(kind)
+        
+        columns = {column: np.repeat(np.array(values, dtype=object), counts)
+                   for column, values in document_columns.items()}
+        columns.update(items.arrays())
+        return pd.DataFrame({column: pd.Series(columns[column], dtype=columns[column].dtype, copy=False)
+                             for column in LINE_ITEM_COLUMNS}, copy=False)
     
-    def save_items_data(self, invoices: List[Dict]):
+    def project_line_items(self, line_items: pd.DataFrame, columns: Dict[str, str],
+                           kind: str = None) -> pd.DataFrame:
+        """Select (and rename) columns of the line-item table, optionally for one document type"""
+        if kind is not None:
+            line_items = line_items[line_items['type'] == kind]
+        if len(line_items) == 0:
+            return pd.DataFrame()  # Same empty output as before there was a line-item table
+        return line_items[list(columns)].rename(columns=columns)
+    
+    def save_items_data(self, line_items: pd.DataFrame, replaced_files: Set[str] = None):
         """Save all items data to CSV"""
-        items_data = []
-        
-        for invoice in invoices:
-            for item in invoice['items']:
-                items_data.append({
-                    'invoice_number': invoice['invoice_number'],
-                    'date': invoice['date'],
-                    'file_name': invoice['file_name'],
-                    'item_name': item['description'],
-                    'quantity': item['quantity'],
-                    'rate_per_item': item['rate'],
-                    'total_amount': item['amount']
-                })
-        
-        df = pd.DataFrame(items_data)
-        df.to_csv(self.items_file, index=False)
-        print(f"Saved {len(items_data)} invoice items to {self.items_file}")
-    
-    def save_receipt_data(self, receipts: List[Dict]):
+        df = self.project_line_items(line_items, INVOICE_ITEM_COLUMNS, 'invoice')
+        if replaced_files is not None:
+            df = self.merge_with_existing(self.items_file, df, replaced_files, ['file_name'])
+        write_table(df, self.items_file)
+        print(f"Saved {len(df)} invoice items to {self.items_file}")
+    
+    def save_receipt_data(self, line_items: pd.DataFrame, replaced_files: Set[str] = None):
         """Save all receipt data to CSV"""
-        if not receipts:
+        df = self.project_line_items(line_items, RECEIPT_ITEM_COLUMNS, 'receipt')
+        if len(df) == 0 and not replaced_files:
             print("No receipts to save")
             return
         
-        receipt_data = []
-        for receipt in receipts:
-            for item in receipt['items']:
-                receipt_data.append({
-                    'receipt_number': receipt['receipt_number'],
-                    'date': receipt['date'],
-                    'file_name': receipt['file_name'],
-                    'item_name': item['description'],
-                    'quantity': item['quantity'],
-                    'rate_per_item': item['rate'],
-                    'total_amount': item['amount'],
-                    'type': 'receipt'
-                })
-        
-        df = pd.DataFrame(receipt_data)
-        df.to_csv(self.receipt_items_file, index=False)
-        print(f"Saved {len(receipt_data)} receipt items to {self.receipt_items_file}")
-    
-    def save_combined_data(self, invoices: List[Dict], receipts: List[Dict]):
+        if replaced_files is not None:
+            df = self.merge_with_existing(self.receipt_items_file, df, replaced_files, ['file_name'])
+        write_table(df, self.receipt_items_file)
+        print(f"Saved {len(df)} receipt items to {self.receipt_items_file}")
+    
+    def save_combined_data(self, line_items: pd.DataFrame, replaced_files: Set[str] = None) -> pd.DataFrame:
         """Save combined invoice and receipt data to CSV"""
-        combined_data = []
-        
-        # Add invoice data
-        for invoice in invoices:
-            for item in invoice['items']:
-                combined_data.append({
-                    'document_number': invoice['invoice_number'],
-                    'date': invoice['date'],
-                    'file_name': invoice['file_name'],
-                    'item_name': item['description'],
-                    'quantity': item['quantity'],
-                    'rate_per_item': item['rate'],
-                    'total_amount': item['amount'],
-                    'type': 'invoice'
-                })
-        
-        # Add receipt data
-        for receipt in receipts:
-            for item in receipt['items']:
-                combined_data.append({
-                    'document_number': receipt['receipt_number'],
-                    'date': receipt['date'],
-                    'file_name': receipt['file_name'],
-                    'item_name': item['description'],
-                    'quantity': item['quantity'],
-                    'rate_per_item': item['rate'],
-                    'total_amount': item['amount'],
-                    'type': 'receipt'
-                })
-        
-        df = pd.DataFrame(combined_data)
-        df.to_csv(self.combined_items_file, index=False)
-        print(f"Saved {len(combined_data)} combined items (invoices + receipts) to {self.combined_items_file}")
-    
-    def save_individual_invoice_csvs(self, invoices: List[Dict]):
-        """Save individual CSV files for each invoice"""
-        for invoice in invoices:
-            if not invoice['items']:
-                continue
-                
-            # Create CSV filename from PDF filename
-            pdf_name = invoice['file_name']
-            csv_name = pdf_name.replace('.pdf', '.csv')
-            csv_path = os.path.join(self.invoice_dir, csv_name)
+        df = line_items if len(line_items) > 0 else pd.DataFrame()
+        if replaced_files is not None:
+            # Full runs write invoices before receipts, each in file order
+            df = self.merge_with_existing(self.combined_items_file, df, replaced_files, ['type', 'file_name'])
+        write_table(df, self.combined_items_file)
+        print(f"Saved {len(df)} combined items (invoices + receipts) to {self.combined_items_file}")
+        
+        return df
+    
+    def save_individual_invoice_csvs(self, line_items: pd.DataFrame):
+        """Save individual CSV files for each invoice
+        
+        Each CSV gets a small .meta.json sidecar with the invoice number and date
+        and the PDF's size and SHA-256, which lets the next run load the invoice
+        without re-parsing the PDF as long as the PDF is unchanged.
+        """
+        saved = 0
+        invoice_rows = line_items[line_items['type'] == 'invoice']
+        for pdf_name, rows in invoice_rows.groupby('file_name', sort=False):
+            pdf_path = os.path.join(self.invoice_dir, pdf_name)
+            if self.fresh_sibling_meta(pdf_path) is not None:
+                continue  # Already written from this PDF by an earlier run
             
-            # Prepare data for this invoice
-            invoice_items = []
-            for item in invoice['items']:
-                invoice_items.append({
-                    'item_name': item['description'],
-                    'quantity': item['quantity'],
-                    'rate_per_item': item['rate'],
-                    'total_amount': item['amount']
-                })
+            # Create CSV filename from PDF filename
+            csv_path, meta_path = self.sibling_csv_paths(pdf_name)
             
             # Save to CSV
-            df = pd.DataFrame(invoice_items)
-            df.to_csv(csv_path, index=False)
+            rows[INDIVIDUAL_CSV_COLUMNS].to_csv(csv_path, index=False)
+            with open(meta_path, 'w') as f:
+                json.dump({
+                    'invoice_number': rows['document_number'].iloc[0],
+                    'date': rows['date'].iloc[0],
+                    'parser_version': INVOICE_PARSER_VERSION,
+                    'pdf_size': os.stat(pdf_path).st_size,
+                    'pdf_sha256': file_sha256(pdf_path)
+                }, f)
+            saved += 1
             print(f"Saved individual invoice CSV: {csv_path}")
         
-        print(f"Created {len(invoices)} individual invoice CSV files")
+        print(f"Created {saved} individual invoice CSV files")
     
-    def create_price_tracking(self, invoices: List[Dict], receipts: List[Dict] = None):
+    def create_price_tracking(self, line_items: pd.DataFrame):
         """Create price tracking file for comparison including both invoices and receipts"""
-        price_data = []
-        
-        # Add invoice data
-        for invoice in invoices:
-            for item in invoice['items']:
-                price_data.append({
-                    'date': invoice['date'],
-                    'item_name': item['description'],
-                    'price_per_item': item['rate'],
-                    'document_number': invoice['invoice_number'],
-                    'document_type': 'invoice'
-                })
-        
-        # Add receipt data if available
-        if receipts:
-            for receipt in receipts:
-                for item in receipt['items']:
-                    price_data.append({
-                        'date': receipt['date'],
-                        'item_name': item['description'],
-                        'price_per_item': item['rate'],
-                        'document_number': receipt['receipt_number'],
-                        'document_type': 'receipt'
-                    })
-        
-        df = pd.DataFrame(price_data)
+        if self.ledger:
+            return self.save_price_tracking(self.ledger.price_tracking())
+        return self.save_price_tracking(self.project_line_items(line_items, PRICE_TRACKING_COLUMNS))
+    
+    def with_item_ids(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Replace the item_name column with the items' ids in the item catalog"""
+        item_ids = self.item_catalog().item_ids(df['item_name'])
+        return df.drop(columns='item_name').assign(item_id=item_ids)[
+            ['item_id' if column == 'item_name' else column for column in df.columns]]
+    
+    def price_observations(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Price tracking rows with catalog item ids and parsed dates, in their original order"""
+        df = self.with_item_ids(df)
+        df['date'] = pd.to_datetime(df['date'], format='%m/%d/%Y', errors='coerce')
+        return df.dropna(subset=['date'])  # Remove rows with invalid dates
+    
+    def new_price_observations(self, invoices: List[InvoiceDocument],
+                               receipts: List[ReceiptDocument]) -> pd.DataFrame:
+        """The price tracking rows of just these documents"""
+        df = self.project_line_items(self.build_line_items(invoices, receipts), PRICE_TRACKING_COLUMNS)
+        if len(df) == 0:
+            return pd.DataFrame({'item_id': np.zeros(0, dtype='int32'),
+                                 'date': np.zeros(0, dtype='datetime64[ns]'),
+                                 'price_per_item': np.zeros(0, dtype='float64')})
+        return self.price_observations(df)
+    
+    def ordered_price_observations(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Price observations ordered by item name, then date, as price tracking stores them"""
+        df = self.price_observations(df)
+        ranks = self.item_catalog().name_ranks()[df['item_id'].to_numpy()]
+        return df.iloc[np.lexsort((df['date'].to_numpy(), ranks))]
+    
+    def save_price_tracking(self, df: pd.DataFrame):
+        """Convert dates, order by item and date and save the price tracking file
+        
+        Items are stored by catalog id; the catalog is saved first, so every id in
+        the file can be resolved. Rows are still ordered by item name.
+        """
         if len(df) > 0:
-            df['date'] = pd.to_datetime(df['date'], format='%m/%d/%Y', errors='coerce')
-            df = df.dropna(subset=['date'])  # Remove rows with invalid dates
-            df = df.sort_values(['item_name', 'date'])
+            df = self.ordered_price_observations(df)
+            self.item_catalog().save()
         
-        df.to_csv(self.price_tracking_file, index=False)
+        write_table(df, self.price_tracking_file)
         print(f"Saved price tracking data to {self.price_tracking_file}")
         
         return df
     
-    def analyze_price_changes(self, price_df: pd.DataFrame):
-        """Analyze price changes and calculate percentage increases"""
-        price_changes = []
+    def observation_order(self, price_df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """Row order of price_df by item (in order of first appearance), then date, and each
+        ordered row's item code
         
-        for item_name in price_df['item_name'].unique():
-            item_prices = price_df[price_df['item_name'] == item_name].copy()
-            item_prices = item_prices.sort_values('date')
-            
-            if len(item_prices) > 1:
-                for i in range(1, len(item_prices)):
-                    prev_price = item_prices.iloc[i-1]['price_per_item']
-                    curr_price = item_prices.iloc[i]['price_per_item']
-                    
-                    if prev_price != curr_price:
-                        percentage_change = ((curr_price - prev_price) / prev_price) * 100
-                        
-                        price_changes.append({
-                            'item_name': item_name,
-                            'previous_date': item_prices.iloc[i-1]['date'].strftime('%m/%d/%Y'),
-                            'current_date': item_prices.iloc[i]['date'].strftime('%m/%d/%Y'),
-                            'previous_price': prev_price,
-                            'current_price': curr_price,
-                            'price_change': curr_price - prev_price,
-                            'percentage_change': round(percentage_change, 2)
-                        })
-        
-        if price_changes:
-            changes_df = pd.DataFrame(price_changes)
-            changes_df.to_csv('price_changes.csv', index=False)
-            print(f"Saved {len(price_changes)} price changes to price_changes.csv")
-            
+        The order of one item's rows depends only on that item's rows, so a subset of
+        the items is ordered exactly as within the whole table.
+        """
+        codes, _ = pd.factorize(price_df['item_id'])
+        dates = price_df['date'].to_numpy()
+        order = np.lexsort((dates, codes))
+        codes = codes[order]
+        
+        # Rows of one item sharing a date are ordered by numpy's (unstable) quicksort,
+        # as sorting each item's rows separately would
+        sorted_dates = dates[order]
+        tied = (codes[1:] == codes[:-1]) & (sorted_dates[1:] == sorted_dates[:-1])
+        for code in np.unique(codes[1:][tied]):
+            start, end = np.searchsorted(codes, [code, code + 1])
+            rows = np.sort(order[start:end])
+            order[start:end] = rows[np.argsort(dates[rows], kind='quicksort')]
+        return order, codes
+    
+    def record_last_observations(self, state: PriceChangeState, price_df: pd.DataFrame):
+        """Set each item's last observation in price_df as its last price in the state,
+        and whether any two of its observations share a day but not a price"""
+        if len(price_df) == 0:
+            return
+        order, codes = self.observation_order(price_df)
+        last = order[np.flatnonzero(np.append(codes[1:] != codes[:-1], True))]
+        item_ids = price_df['item_id'].to_numpy()[last]
+        sorted_dates = price_df['date'].to_numpy()[order]
+        sorted_prices = price_df['price_per_item'].to_numpy()[order]
+        tied = ((codes[1:] == codes[:-1]) & (sorted_dates[1:] == sorted_dates[:-1]) &
+                (sorted_prices[1:] != sorted_prices[:-1]))
+        state.tied[item_ids] = np.isin(np.arange(len(last)), codes[1:][tied])
+        state.days[item_ids] = price_df['date'].to_numpy()[last].astype('datetime64[D]').astype('int64')
+        state.prices[item_ids] = price_df['price_per_item'].to_numpy(dtype='float64')[last]
+    
+    def find_price_changes(self, price_df: pd.DataFrame) -> pd.DataFrame:
+        """Compare each item's consecutive prices, items in order of first appearance
+        
+        Items are grouped by their integer catalog id; names are looked up in the
+        catalog for the changes found.
+        """
+        if len(price_df) == 0:
+            return pd.DataFrame(columns=PRICE_CHANGE_COLUMNS)
+        
+        order, codes = self.observation_order(price_df)
+        dates = price_df['date'].to_numpy()
+        prices = price_df['price_per_item'].to_numpy()[order]
+        
+        # Pairs of neighbouring rows for the same item whose price differs
+        changed = (codes[1:] == codes[:-1]) & (codes[1:] >= 0) & (prices[1:] != prices[:-1])
+        previous = np.flatnonzero(changed)
+        current = previous + 1
+        prev_price = prices[previous]
+        curr_price = prices[current]
+        
+        # Format each distinct date once
+        date_codes, unique_dates = pd.factorize(dates[order])
+        formatted = pd.DatetimeIndex(unique_dates).strftime('%m/%d/%Y').to_numpy()
+        
+        return pd.DataFrame({
+            'item_name': self.item_catalog().item_names(price_df['item_id'].to_numpy()[order][current]),
+            'previous_date': formatted[date_codes[previous]],
+            'current_date': formatted[date_codes[current]],
+            'previous_price': prev_price,
+            'current_price': curr_price,
+            'price_change': curr_price - prev_price,
+            'percentage_change': np.round(((curr_price - prev_price) / prev_price) * 100, 2)
+        }, columns=PRICE_CHANGE_COLUMNS)
+    
+    def update_price_changes(self, price_df: pd.DataFrame, new_price_df: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """Extend the saved price changes with those of newly parsed documents
+        
+        new_price_df holds the price observations of the documents parsed in this
+        run, all of which are also in price_df. Each new observation is compared
+        with its item's last known price. Items that need their whole history
+        compared again are recomputed from price_df: those with a backdated
+        observation (on or before the item's last known date), with two observations
+        on one day at different prices (whose order numpy's unstable sort may change
+        as rows are added), or with fewer observations than expected because
+        documents were removed or replaced. Their old rows are dropped and the new
+        rows of every item are appended, so after incremental runs price_changes is
+        no longer grouped by item. Returns None when there is no usable state to
+        extend.
+        """
+        state = PriceChangeState.load(self.price_state_file)
+        changes_file = find_table(self.price_changes_file)
+        catalog = self.item_catalog()
+        if state is None or len(price_df) == 0 or not state.matches(changes_file, catalog):
+            return None
+        
+        state.resize(len(catalog.names))
+        new_ids = new_price_df['item_id'].to_numpy(dtype='int64')
+        new_days = new_price_df['date'].to_numpy().astype('datetime64[D]').astype('int64')
+        counts = np.bincount(price_df['item_id'].to_numpy(dtype='int64'), minlength=len(catalog.names))
+        
+        # Items whose history changed anywhere but at its end
+        recompute = counts != state.counts + np.bincount(new_ids, minlength=len(catalog.names))
+        known = state.counts[new_ids] > 0
+        recompute[new_ids[known & (new_days <= state.days[new_ids])]] = True
+        recompute[new_ids[state.tied[new_ids]]] = True
+        day_keys = (new_ids << 32) | (new_days + 2**31)
+        by_key = np.argsort(day_keys, kind='stable')
+        day_keys, new_prices = day_keys[by_key], new_price_df['price_per_item'].to_numpy()[by_key]
+        same_day = (day_keys[1:] == day_keys[:-1]) & (new_prices[1:] != new_prices[:-1])
+        recompute[day_keys[1:][same_day] >> 32] = True
+        
+        # Compare the other items' new observations with their last known price
+        appended = new_price_df[~recompute[new_ids]][['item_id', 'date', 'price_per_item']]
+        continued = np.unique(appended['item_id'].to_numpy(dtype='int64'))
+        continued = continued[state.counts[continued] > 0]
+        last_known = pd.DataFrame({
+            'item_id': continued,
+            'date': state.days[continued].astype('datetime64[D]').astype(new_price_df['date'].dtype),
+            'price_per_item': state.prices[continued]
+        })
+        extended = pd.concat([last_known, appended], ignore_index=True) if len(last_known) else appended
+        recomputed = price_df[recompute[price_df['item_id'].to_numpy(dtype='int64')]]
+        new_changes = [self.find_price_changes(extended), self.find_price_changes(recomputed)]
+        new_changes = [changes for changes in new_changes if len(changes) > 0]
+        
+        existing = self.read_output_table(changes_file) if changes_file else None
+        if existing is None or len(existing) == 0:
+            existing = kept = pd.DataFrame(columns=PRICE_CHANGE_COLUMNS)
+        else:
+            kept = existing[~recompute[catalog.item_ids(existing['item_name'])]]
+        print(f"Incremental price analysis: {len(appended)} new observations compared, "
+              f"{int(recompute.sum())} items recomputed")
+        
+        changes_df = pd.concat([kept] + new_changes, ignore_index=True) if new_changes else kept
+        if (changes_file and changes_file.endswith('.csv') and len(kept) == len(existing) and
+                changes_file == self.price_changes_file):
+            # Nothing dropped, so the new rows can simply be appended to the CSV
+            for changes in new_changes:
+                changes.to_csv(changes_file, mode='a', header=False, index=False)
+        else:
+            # Written even when empty, so no dropped row survives on disk
+            write_table(changes_df, self.price_changes_file)
+        if new_changes:
+            print(f"Added {sum(len(changes) for changes in new_changes)} price changes to {self.price_changes_file}")
+        
+        state.counts = counts
+        self.record_last_observations(state, extended)
+        self.record_last_observations(state, recomputed)
+        state.save(self.price_state_file, find_table(self.price_changes_file), catalog)
+        return changes_df
+    
+    def save_price_changes(self, changes_df: pd.DataFrame):
+        if len(changes_df) > 0:
+            write_table(changes_df, self.price_changes_file)
+            print(f"Saved {len(changes_df)} price changes to {self.price_changes_file}")
+    
+    def save_price_state(self, price_df: pd.DataFrame, changes_file: Optional[str]):
+        """Record every item's last observed price for the next incremental analysis
+        
+        changes_file is the price changes file just written from price_df, or None
+        when none was written.
+        """
+        item_count = len(self.item_catalog().names)
+        state = PriceChangeState(np.zeros(item_count, dtype='int64'), np.zeros(item_count, dtype='float64'),
+                                 np.zeros(item_count, dtype='int64'), np.zeros(item_count, dtype=bool))
+        if len(price_df) > 0:
+            state.counts = np.bincount(price_df['item_id'].to_numpy(dtype='int64'), minlength=item_count)
+            self.record_last_observations(state, price_df)
+        state.save(self.price_state_file, changes_file, self.item_catalog())
+    
+    def analyze_price_changes(self, price_df: pd.DataFrame, new_price_df: pd.DataFrame = None):
+        """Analyze price changes and calculate percentage increases
+        
+        With new_price_df, the observations of the documents parsed in an
+        incremental run, the saved price changes are extended from each item's last
+        known price instead of being recomputed (see update_price_changes). Ledger
+        runs analyze the ledger's whole price history.
+        """
+        changes_df = None
+        if new_price_df is not None and not self.ledger:
+            changes_df = self.update_price_changes(price_df, new_price_df)
+        
+        if changes_df is None:
+            changes_df = self.find_price_changes(price_df)
+            self.save_price_changes(changes_df)
+            self.save_price_state(price_df, self.price_changes_file if len(changes_df) > 0 else None)
+        
+        if len(changes_df) > 0:
             # Show summary
             print("\nPrice Change Summary:")
             print(f"Items with price increases: {len(changes_df[changes_df['percentage_change'] > 0])}")
@@ -445,14 +1929,63 @@ class InvoiceProcessor:
                 print(f"Largest price decrease: {changes_df['percentage_change'].min():.2f}%")
         else:
             print("No price changes detected across invoices")
+        
+        return changes_df
+    
+    def load_price_tracking(self) -> Optional[pd.DataFrame]:
+        """Load the saved price tracking table with its dates parsed (None when missing or unusable)"""
+        df = self.read_output_table(self.price_tracking_file)
+        if df is None:
+            print(f"Error: {self.price_tracking_file} not found. Run the track stage first.")
+            return None
+        if len(df) == 0:
+            return df
+        
+        if 'item_name' in df.columns:
+            df = self.with_item_ids(df)  # Written before price tracking used catalog ids
+        elif df['item_id'].max() >= len(self.item_catalog().names):
+            print(f"Error: {self.price_tracking_file} has items missing from {self.catalog_file}. "
+                  f"Run the track stage again.")
+            return None
+        
+        # CSV holds ISO dates; the columnar formats come back in the documents' format
+        iso = find_table(self.price_tracking_file).endswith('.csv')
+        df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d' if iso else DATE_FORMAT)
+        return df
+    
+    def save_price_index(self, price_df: pd.DataFrame) -> PriceIndex:
+        """Index price tracking for point-in-time price lookups and save the index"""
+        index = PriceIndex.from_price_tracking(price_df, self.item_catalog())
+        index.save(self.price_index_file)
+        print(f"Saved price index to {self.price_index_file}")
+        return index
+    
+    def load_price_index(self) -> Optional[PriceIndex]:
+        """Load the price index, rebuilding it when price tracking was saved after it"""
+        tracking_file = find_table(self.price_tracking_file)
+        if tracking_file is None:
+            print(f"Error: {self.price_tracking_file} not found. Run the track stage first.")
+            return None
+        if (os.path.exists(self.price_index_file) and
+                os.path.getmtime(self.price_index_file) >= os.path.getmtime(tracking_file)):
+            return PriceIndex.load(self.price_index_file, self.item_catalog())
+        
+        price_df = self.load_price_tracking()
+        if price_df is None:
+            return None
+        return self.save_price_index(price_df)
     
     def load_price_data(self):
         """Load price changes data"""
-        if not os.path.exists('price_changes.csv'):
-            print("Error: price_changes.csv not found. Please run process_invoices.py first.")
+        price_changes_file = find_table(self.price_changes_file)
+        if price_changes_file is None:
+            print(f"Error: {self.price_changes_file} not found. Please run process_invoices.py first.")
             return None
             
-        df = pd.read_csv('price_changes.csv')
+        return self.price_increases(read_table(price_changes_file, float_precision='round_trip'))
+    
+    def price_increases(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Price increases only, largest first"""
         # Filter for price increases only
         increases = df[df['percentage_change'] > 0].copy()
         # Sort by percentage change descending
@@ -461,6 +1994,9 @@ class InvoiceProcessor:
     
     def create_header(self, story, styles, custom_title):
         """Add report header"""
+        from reportlab.lib.units import inch
+        from reportlab.platypus import Paragraph, Spacer
+        
         title = Paragraph("Mother India Foods LLC - Price Increase Report", custom_title)
         story.append(title)
         story.append(Spacer(1, 0.2*inch))
@@ -471,6 +2007,9 @@ class InvoiceProcessor:
     
     def create_summary_section(self, story, styles, data):
         """Add summary statistics"""
+        from reportlab.lib.units import inch
+        from reportlab.platypus import Paragraph, Spacer
+        
         summary_title = Paragraph("Summary", styles['Heading2'])
         story.append(summary_title)
         story.append(Spacer(1, 0.1*inch))
@@ -489,43 +2028,43 @@ class InvoiceProcessor:
         story.append(summary_para)
         story.append(Spacer(1, 0.3*inch))
     
+    def price_table_rows(self, data: pd.DataFrame, item_style) -> List[List]:
+        """Format the price table cells column by column; long item names wrap"""
+        from reportlab.platypus import Paragraph
+        
+        # Wrap long item names, all sharing one Paragraph style
+        item_names = [Paragraph(name, item_style) if len(name) > 35 else name for name in data['item_name']]
+        
+        def money(column):
+            return np.char.mod('$%.2f', data[column].to_numpy(dtype='float64')).tolist()
+        
+        percentages = np.char.mod('%.2f%%', data['percentage_change'].to_numpy(dtype='float64')).tolist()
+        return [list(row) for row in zip(item_names, money('previous_price'), data['previous_date'].tolist(),
+                                         money('current_price'), data['current_date'].tolist(),
+                                         money('price_change'), percentages)]
+    
     def create_price_table(self, story, styles, data):
-        """Create formatted table of price increases"""
+        """Create formatted table of price increases
+        
+        All style commands go into a single TableStyle per table, and each table is a
+        LongTable that repeats its header row on every page.
+        """
+        from reportlab.lib import colors
+        from reportlab.lib.enums import TA_LEFT
+        from reportlab.lib.styles import ParagraphStyle
+        from reportlab.lib.units import inch
+        from reportlab.platypus import LongTable, Paragraph, Spacer, TableStyle
+        
         table_title = Paragraph("Detailed Price Increases", styles['Heading2'])
         story.append(table_title)
         story.append(Spacer(1, 0.1*inch))
         
         # Prepare table data with shorter column headers
-        table_data = [['Item Name', 'Prev Price', 'Prev Date', 'New Price', 'New Date', 'Increase', '% Change']]
-        
-        for _, row in data.iterrows():
-            # Wrap long item names using Paragraph for better formatting
-            item_name = row['item_name']
-            if len(item_name) > 35:
-                item_para = Paragraph(item_name, ParagraphStyle(
-                    'ItemName',
-                    fontSize=7,
-                    leading=8,
-                    alignment=TA_LEFT
-                ))
-            else:
-                item_para = item_name
-            
-            table_data.append([
-                item_para,
-                f"${row['previous_price']:.2f}",
-                row['previous_date'],
-                f"${row['current_price']:.2f}",
-                row['current_date'],
-                f"${row['price_change']:.2f}",
-                f"{row['percentage_change']:.2f}%"
-            ])
-        
-        # Create table with better column widths - more space for item names
-        table = Table(table_data, colWidths=[2.4*inch, 0.65*inch, 0.85*inch, 0.65*inch, 0.85*inch, 0.65*inch, 0.65*inch])
-        
-        # Style the table
-        table.setStyle(TableStyle([
+        item_style = ParagraphStyle('ItemName', fontSize=7, leading=8, alignment=TA_LEFT)
+        header = ['Item Name', 'Prev Price', 'Prev Date', 'New Price', 'New Date', 'Increase', '% Change']
+        rows = self.price_table_rows(data, item_style)
+        
+        style_commands = [
             # Header style
             ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
             ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
@@ -551,20 +2090,34 @@ class InvoiceProcessor:
             # Highlighting high increases (>5%)
             ('TEXTCOLOR', (6, 1), (6, -1), colors.red),  # % increase column in red
             ('FONTNAME', (6, 1), (6, -1), 'Helvetica-Bold'),
-        ]))
+        ]
         
-        # Highlight rows with high percentage increases
-        for i, (_, row) in enumerate(data.iterrows(), 1):
-            if row['percentage_change'] > 5:
-                table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, i), (-1, i), colors.mistyrose),
-                ]))
+        high_increase = data['percentage_change'].to_numpy() > 5
+        col_widths = [2.4*inch, 0.65*inch, 0.85*inch, 0.65*inch, 0.85*inch, 0.65*inch, 0.65*inch]
+        
+        # Splitting a table across pages re-measures every remaining row, so long
+        # reports are built as a series of tables of PRICE_TABLE_CHUNK_ROWS rows
+        for start in range(0, max(len(rows), 1), PRICE_TABLE_CHUNK_ROWS):
+            chunk_style = list(style_commands)
+            
+            # Highlight rows with high percentage increases, one command per run of adjacent rows
+            high = np.concatenate(([False], high_increase[start:start + PRICE_TABLE_CHUNK_ROWS], [False]))
+            edges = np.flatnonzero(np.diff(high.astype('int8')))
+            for first, last in zip(edges[::2] + 1, edges[1::2]):
+                chunk_style.append(('BACKGROUND', (0, int(first)), (-1, int(last)), colors.mistyrose))
+            
+            # Create table with better column widths - more space for item names
+            table = LongTable([header] + rows[start:start + PRICE_TABLE_CHUNK_ROWS], colWidths=col_widths, repeatRows=1)
+            table.setStyle(TableStyle(chunk_style))
+            story.append(table)
         
-        story.append(table)
         story.append(Spacer(1, 0.3*inch))
     
     def create_notes_section(self, story, styles):
         """Add notes and explanation"""
+        from reportlab.lib.units import inch
+        from reportlab.platypus import Paragraph, Spacer
+        
         notes_title = Paragraph("Notes", styles['Heading2'])
         story.append(notes_title)
         story.append(Spacer(1, 0.1*inch))
@@ -579,19 +2132,73 @@ class InvoiceProcessor:
         notes_para = Paragraph(notes_text, styles['Normal'])
         story.append(notes_para)
     
-    def generate_price_report(self):
-        """Generate the complete PDF report"""
+    def report_digest(self, data: pd.DataFrame) -> Dict:
+        """Digest of the report's input data and the settings that shape the PDF
+        
+        Prices are hashed as float64 and the other columns by value, so the price
+        changes just analyzed and the same changes read back from disk agree.
+        """
+        sha = hashlib.sha256()
+        for column in PRICE_CHANGE_COLUMNS:
+            values = data[column]
+            if values.dtype.kind == 'f':
+                sha.update(values.to_numpy(dtype='float64').tobytes())
+            else:
+                sha.update(pd.util.hash_array(values.to_numpy(dtype=object)).tobytes())
+        return {
+            'data_sha256': sha.hexdigest(),
+            'report_version': REPORT_VERSION,
+            'table_chunk_rows': PRICE_TABLE_CHUNK_ROWS
+        }
+    
+    def report_is_current(self, digest: Dict) -> bool:
+        """Check that the saved report was built from the same data and settings and is untouched since"""
+        try:
+            with open(self.report_digest_file) as f:
+                saved = json.load(f)
+            stat = os.stat(self.report_file)
+        except (OSError, ValueError):
+            return False
+        return saved == dict(digest, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+    
+    def save_report_digest(self, digest: Dict):
+        stat = os.stat(self.report_file)
+        tmp = f"{self.report_digest_file}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(dict(digest, size=stat.st_size, mtime_ns=stat.st_mtime_ns), f, indent=1, sort_keys=True)
+        os.replace(tmp, self.report_digest_file)
+    
+    def generate_price_report(self, changes_df: pd.DataFrame = None):
+        """Generate the complete PDF report
+        
+        Uses changes_df when the analysis just ran in this process, otherwise the
+        saved price changes. The build is skipped when the existing report was made
+        from the same price increases and report settings, unless force_report is set.
+        """
         # Load data
-        data = self.load_price_data()
+        data = self.load_price_data() if changes_df is None else self.price_increases(changes_df)
         if data is None or len(data) == 0:
             print("No price increases found to report.")
             return
         
+        digest = self.report_digest(data)
+        if not self.force_report and self.report_is_current(digest):
+            print(f"Price increases unchanged since {self.report_file} was generated; "
+                  f"not rebuilding it (use --force to rebuild)")
+            return
+        
         print(f"Generating PDF report for {len(data)} price increases...")
         
+        from reportlab.lib import colors
+        from reportlab.lib.enums import TA_CENTER
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.units import inch
+        from reportlab.platypus import SimpleDocTemplate
+        
         # Create PDF document
         doc = SimpleDocTemplate(
-            "price_increase_report.pdf",
+            self.report_file,
             pagesize=A4,
             rightMargin=0.5*inch,
             leftMargin=0.5*inch,
@@ -621,7 +2228,8 @@ class InvoiceProcessor:
         
         # Build PDF
         doc.build(story)
-        print(f"Report generated successfully: price_increase_report.pdf")
+        self.save_report_digest(digest)
+        print(f"Report generated successfully: {self.report_file}")
         
         # Show summary
         print(f"\\nReport Summary:")
@@ -629,43 +2237,230 @@ class InvoiceProcessor:
         print(f"- Average increase: {data['percentage_change'].mean():.2f}%")
         print(f"- Largest increase: {data['percentage_change'].max():.2f}% ({data.loc[data['percentage_change'].idxmax(), 'item_name']})")
     
-    def run(self):
-        """Main processing function"""
-        print("Starting invoice and receipt processing...")
+    def extract(self, incremental: bool = False) -> Optional[Tuple[List[InvoiceDocument], List[ReceiptDocument],
+                                                                   pd.DataFrame]]:
+        """Extract stage: parse the PDFs and save the item tables
+        
+        With incremental=True only PDFs that are new or changed since the last run
+        (according to the manifest) are parsed, and their rows are merged into the
+        existing output files. Returns (invoices, receipts, combined items), or None
+        when there was nothing to process.
+        """
+        manifest = DocumentManifest(self.manifest_file)
+        invoice_files = self.find_invoice_files()
+        receipt_files = self.find_receipt_files()
+        
+        replaced_invoices = replaced_receipts = None
+        if incremental and manifest.exists():
+            removed_invoices = manifest.removed_files(invoice_files, 'invoice')
+            removed_receipts = manifest.removed_files(receipt_files, 'receipt') if self.receipts_dir else []
+            invoice_files = manifest.changed_files(invoice_files)
+            receipt_files = manifest.changed_files(receipt_files)
+            
+            if not invoice_files and not receipt_files and not removed_invoices and not removed_receipts:
+                print("No new or changed invoices or receipts since the last run")
+                return None
+            
+            print(f"Incremental run: {len(invoice_files)} new or changed invoices, "
+                  f"{len(receipt_files)} new or changed receipts, "
+                  f"{len(removed_invoices) + len(removed_receipts)} removed documents")
+            
+            for path in removed_invoices + removed_receipts:
+                manifest.forget(path)
+            replaced_invoices = {Path(path).name for path in removed_invoices + invoice_files}
+            replaced_receipts = {Path(path).name for path in removed_receipts + receipt_files}
+        else:
+            incremental = False
+            manifest.entries = {}
+        
+        if incremental and self.ledger:
+            changed = {str(pdf_file) for pdf_file in invoice_files + receipt_files}
+            unchanged = {entry['sha256'] for path, entry in manifest.entries.items() if path not in changed}
+            if not self.ledger.has_documents(unchanged):
+                print(f"{self.ledger.db_file} does not have every processed document yet; running in full")
+                invoice_files = self.find_invoice_files()
+                receipt_files = self.find_receipt_files()
+                replaced_invoices = replaced_receipts = None
+                incremental = False
+                manifest.entries = {}
         
         # Process all invoices
-        invoices = self.process_all_invoices()
+        with self.measure('process_all_invoices'):
+            invoices = self.process_all_invoices(invoice_files)
         print(f"Processed {len(invoices)} invoices")
         
         # Process all receipts
-        receipts = self.process_all_receipts()
+        with self.measure('process_all_receipts'):
+            receipts = self.process_all_receipts(receipt_files)
         print(f"Processed {len(receipts)} receipts")
         
-        if not invoices and not receipts:
+        if not invoices and not receipts and not incremental:
             print("No invoices or receipts found to process")
-            return
+            return None
         
-        # Save items data
-        if invoices:
-            self.save_items_data(invoices)
-            # Save individual invoice CSVs
-            self.save_individual_invoice_csvs(invoices)
+        with self.measure('save_items'):
+            # Flatten every document once; each output is a projection of this table
+            line_items = self.build_line_items(invoices, receipts)
+            
+            # Save items data
+            if invoices or replaced_invoices:
+                self.save_items_data(line_items, replaced_invoices)
+            if invoices:
+                # Save individual invoice CSVs
+                self.save_individual_invoice_csvs(line_items)
+            
+            if receipts or replaced_receipts:
+                self.save_receipt_data(line_items, replaced_receipts)
+            
+            # Save combined data, merging with the previous output in incremental mode
+            replaced_files = replaced_invoices | replaced_receipts if incremental else None
+            combined_df = self.save_combined_data(line_items, replaced_files)
+        
+        # Record what the outputs now contain; failed files are retried next run
+        processed = {(doc.file_name, 'invoice') for doc in invoices}
+        processed.update((doc.file_name, 'receipt') for doc in receipts)
+        document_hashes = {'invoice': {}, 'receipt': {}}
+        for pdf_files, kind in ((invoice_files, 'invoice'), (receipt_files, 'receipt')):
+            for pdf_file in pdf_files:
+                if (pdf_file.name, kind) in processed:
+                    manifest.record(str(pdf_file), kind)
+                    document_hashes[kind][pdf_file.name] = manifest.entries[str(pdf_file)]['sha256']
+                else:
+                    manifest.forget(str(pdf_file))
+        
+        if self.ledger:
+            with self.measure('update_ledger'):
+                self.ledger.store(invoices, 'invoice', document_hashes['invoice'])
+                self.ledger.store(receipts, 'receipt', document_hashes['receipt'])
+                self.ledger.prune(entry['sha256'] for entry in manifest.entries.values())
+        manifest.save()
+        
+        return invoices, receipts, combined_df
+    
+    def track(self, combined_df: pd.DataFrame = None) -> Optional[pd.DataFrame]:
+        """Track stage: build price tracking, from the saved combined items unless given"""
+        with self.measure('create_price_tracking'):
+            if combined_df is None and not self.ledger:
+                combined_df = self.read_output_table(self.combined_items_file)
+                if combined_df is None:
+                    print(f"Error: {self.combined_items_file} not found. Run the extract stage first.")
+                    return None
+            price_df = self.create_price_tracking(combined_df)
+        with self.measure('save_price_index'):
+            self.save_price_index(price_df)
+        return price_df
+    
+    def analyze(self, price_df: pd.DataFrame = None, new_price_df: pd.DataFrame = None) -> Optional[pd.DataFrame]:
+        """Analyze stage: find price changes, from the saved price tracking unless given
         
-        if receipts:
-            self.save_receipt_data(receipts)
+        new_price_df, the price observations of the documents an incremental run
+        parsed, lets the saved price changes be extended instead of recomputed.
+        """
+        with self.measure('analyze_price_changes'):
+            if price_df is None and self.ledger:
+                price_df = self.ordered_price_observations(self.ledger.price_tracking())
+            elif price_df is None:
+                price_df = self.load_price_tracking()
+                if price_df is None:
+                    return None
+            return self.analyze_price_changes(price_df, new_price_df)
+    
+    def report(self, changes_df: pd.DataFrame = None):
+        """Report stage: render the PDF report, from the saved price changes unless given"""
+        with self.measure('generate_price_report'):
+            self.generate_price_report(changes_df)
+    
+    def price(self, queries: List[Tuple[str, str]]):
+        """Price stage: show what was paid for each (item name, date) pair"""
+        index = self.load_price_index()
+        if index is None:
+            return
+        for (item_name, on), price in zip(queries, index.prices_as_of(queries)):
+            paid = "no price on or before that date" if np.isnan(price) else f"${price:.2f}"
+            print(f"{item_name} on {on}: {paid}")
+    
+    def start_worker_pool(self):
+        """Import the heavy modules and start the worker processes ahead of the first document"""
+        for name in ('pandas', 'pdfplumber', 'reportlab.platypus'):
+            importlib.import_module(name)
+        if self.workers > 1:
+            from concurrent.futures import ProcessPoolExecutor, wait
+            
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=start_pool_worker)
+            wait([self.pool.submit(start_pool_worker) for _ in range(self.workers)])
+    
+    def update(self) -> Optional[pd.DataFrame]:
+        """Process new or changed PDFs incrementally through analysis; the price changes, or None"""
+        extracted = self.extract(incremental=True)
+        if extracted is None:
+            return None
+        invoices, receipts, combined_df = extracted
+        price_df = self.track(combined_df)
+        return self.analyze(price_df, self.new_price_observations(invoices, receipts))
+    
+    def watch(self, debounce: float = 5.0, poll_interval: float = 0.5):
+        """Watch stage: keep processing PDFs as they land in the invoice and receipt directories
         
-        # Save combined data if we have both
-        if invoices or receipts:
-            self.save_combined_data(invoices, receipts)
+        Each batch of new, changed or removed PDFs goes through an incremental extract,
+        track and analyze straight away. The report is only rebuilt once no PDF has
+        landed for debounce seconds. Runs until interrupted (Ctrl-C).
+        """
+        self.start_worker_pool()
+        directories = [self.invoice_dir]
+        if self.receipts_dir and self.receipts_dir.exists():
+            directories.append(self.receipts_dir)
+        watcher = DirectoryWatcher(directories, poll_interval)
+        print(f"Watching {', '.join(str(directory) for directory in directories)} for PDFs ({watcher.mode})")
+        
+        # Catch up on whatever landed while nothing was watching
+        changes_df = self.update()
+        report_due = time.monotonic() if changes_df is not None else None
+        try:
+            while True:
+                timeout = None if report_due is None else max(0.0, report_due - time.monotonic())
+                changed = watcher.wait(timeout)
+                if not changed:
+                    self.report(changes_df)
+                    changes_df = report_due = None
+                    continue
+                
+                # Gather the rest of a batch being copied in before processing it
+                changed |= watcher.wait(WATCH_SETTLE_SECONDS)
+                start = time.perf_counter()
+                print(f"\n{len(changed)} PDFs changed: {', '.join(sorted(Path(path).name for path in changed))}")
+                update = self.update()
+                if update is not None:
+                    changes_df = update
+                    report_due = time.monotonic() + debounce
+                print(f"Updated outputs in {time.perf_counter() - start:.3f}s")
+        except KeyboardInterrupt:
+            print("\nStopping watch")
+            if report_due is not None:
+                self.report(changes_df)
+        finally:
+            watcher.close()
+            if self.pool:
+                self.pool.shutdown()
+                self.pool = None
+    
+    def run(self, incremental: bool = False):
+        """Main processing function: extract, track, analyze and report"""
+        print("Starting invoice and receipt processing...")
+        
+        extracted = self.extract(incremental)
+        if extracted is None:
+            return
+        invoices, receipts, combined_df = extracted
         
         # Create price tracking (including both invoices and receipts)
-        price_df = self.create_price_tracking(invoices, receipts)
+        price_df = self.track(combined_df)
         
-        # Analyze price changes
-        self.analyze_price_changes(price_df)
+        # Analyze price changes, extending the previous analysis in incremental runs
+        new_price_df = self.new_price_observations(invoices, receipts) if incremental else None
+        changes_df = self.analyze(price_df, new_price_df)
         
         # Generate PDF report
-        self.generate_price_report()
+        self.report(changes_df)
         
         print("\nProcessing complete!")
         print(f"Files generated:")
@@ -676,18 +2471,139 @@ class InvoiceProcessor:
         if invoices or receipts:
             print(f"- {self.combined_items_file}: Combined invoice and receipt items")
         print(f"- {self.price_tracking_file}: Price tracking data")
-        print(f"- price_changes.csv: Price change analysis")
-        print(f"- price_increase_report.pdf: Price increase report")
+        print(f"- {self.catalog_file}: Item names for the item ids in price tracking")
+        print(f"- {self.price_index_file}: Point-in-time price index")
+        print(f"- {self.price_changes_file}: Price change analysis")
+        print(f"- {self.report_file}: Price increase report")
+
+
+COMMANDS = ('run', 'extract', 'track', 'analyze', 'report', 'watch', 'price')
 
 
 if __name__ == "__main__":
-    import sys
+    import argparse
+    
+    extraction = argparse.ArgumentParser(add_help=False)
+    extraction.add_argument("receipts_dir", nargs="?", default=None,
+                            help="Directory of receipt PDFs to process alongside the invoices")
+    extraction.add_argument("--workers", type=int, default=1,
+                            help="Number of worker processes for PDF extraction (default: 1)")
+    extraction.add_argument("--cache-dir", default=".text_cache",
+                            help="Directory for the extracted-text cache (default: .text_cache)")
+    extraction.add_argument("--cache-size-mb", type=int, default=256,
+                            help="Maximum size of the extracted-text cache in MB (default: 256)")
+    extraction.add_argument("--no-cache", action="store_true",
+                            help="Disable the extracted-text cache")
+    extraction.add_argument("--all-pages", action="store_true",
+                            help="Extract every invoice page instead of stopping at the totals block")
+    extraction.add_argument("--reparse", action="store_true",
+                            help="Extract every invoice from its PDF even when an up-to-date "
+                                 "individual CSV exists")
+    extraction.add_argument("--incremental", action="store_true",
+                            help="Only parse PDFs added or changed since the last run and merge them "
+                                 "into the existing output files")
+    
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--metrics", nargs="?", const="pipeline_metrics.json", default=None, metavar="FILE",
+                        help="Record wall time, CPU time and peak memory per stage and write them "
+                             "to FILE (default: pipeline_metrics.json)")
+    common.add_argument("--trace-memory", action="store_true",
+                        help="With --metrics, also trace each stage's peak Python allocations with "
+                             "tracemalloc; this slows the run, and the report marks its times as "
+                             "measured with tracing on")
+    common.add_argument("--format", choices=sorted(OUTPUT_FORMATS), default="csv",
+                        help="File format of the item, price tracking and price change tables "
+                             "(default: csv; parquet and feather need pyarrow)")
+    common.add_argument("--ledger", nargs="?", const="price_ledger.db", default=None, metavar="FILE",
+                        help="Store documents and prices in a SQLite ledger (default: price_ledger.db) "
+                             "and run price tracking and analysis as queries on it")
+    
+    reporting = argparse.ArgumentParser(add_help=False)
+    reporting.add_argument("--force", action="store_true",
+                           help="Rebuild price_increase_report.pdf even when its price increases and "
+                                "settings are unchanged since it was generated")
+    
+    parser = argparse.ArgumentParser(
+        description="Process Mother India Foods invoices and receipts",
+        epilog="Without a command the whole pipeline runs, so 'process_invoices.py /path/to/receipts' "
+               "still works. Each stage reads the previous stage's saved output.")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.add_parser("run", parents=[extraction, common, reporting],
+                        help="Extract, track, analyze and report (the default)")
+    commands.add_parser("extract", parents=[extraction, common],
+                        help="Parse the PDFs into invoice_items, receipt_items and combined_items")
+    stage_defaults = vars(extraction.parse_args([]))
+    for command, help_text in (("track", "Build price_tracking from combined_items"),
+                               ("analyze", "Find price changes in price_tracking")):
+        commands.add_parser(command, parents=[common], help=help_text).set_defaults(**stage_defaults)
+    commands.add_parser("report", parents=[common, reporting],
+                        help="Render price_increase_report.pdf from price_changes").set_defaults(**stage_defaults)
+    watch_parser = commands.add_parser("watch", parents=[extraction, common, reporting],
+                                       help="Keep running and process PDFs as they land (always incremental)")
+    watch_parser.add_argument("--debounce", type=float, default=5.0,
+                              help="Rebuild the report once no PDF has landed for this many seconds "
+                                   "(default: 5)")
+    watch_parser.add_argument("--poll-interval", type=float, default=0.5,
+                              help="Seconds between directory scans where inotify is unavailable "
+                                   "(default: 0.5)")
+    price_parser = commands.add_parser("price", parents=[common],
+                                       help="Show what was paid for items on given dates, from price_index.npz")
+    price_parser.add_argument("lookups", nargs="+", metavar="ITEM DATE",
+                              help="Item name and date (YYYY-MM-DD or MM/DD/YYYY) pairs")
+    price_parser.set_defaults(**stage_defaults)
+    
+    argv = sys.argv[1:]
+    if not argv or argv[0] not in COMMANDS + ('-h', '--help'):
+        argv = ['run'] + argv
+    args = parser.parse_args(argv)
+    
+    if args.command == "price":
+        if len(args.lookups) % 2:
+            parser.error("price takes item name and date pairs")
+        for on in args.lookups[1::2]:
+            try:
+                day_number(on)
+            except ValueError as e:
+                parser.error(str(e))
+    
+    if args.format != "csv":
+        import importlib.util
+        if importlib.util.find_spec("pyarrow") is None:
+            parser.error(f"--format {args.format} needs pyarrow (pip install pyarrow)")
+    
+    if args.receipts_dir:
+        print(f"Using receipts directory: {args.receipts_dir}")
+    
+    text_cache = None
+    if not args.no_cache:
+        text_cache = TextCache(args.cache_dir, max_bytes=args.cache_size_mb * 1024 * 1024)
+    
+    metrics = PipelineMetrics(trace_memory=args.trace_memory) if args.metrics else None
+    ledger = PriceLedger(args.ledger) if args.ledger else None
+    
+    processor = InvoiceProcessor(receipts_dir=args.receipts_dir, workers=args.workers,
+                                 text_cache=text_cache, stream_pages=not args.all_pages,
+                                 use_sibling_csvs=not args.reparse, metrics=metrics,
+                                 output_format=args.format, ledger=ledger,
+                                 force_report=getattr(args, 'force', False))
+    if args.command == "run":
+        processor.run(incremental=args.incremental)
+    elif args.command == "extract":
+        processor.extract(incremental=args.incremental)
+    elif args.command == "track":
+        processor.track()
+    elif args.command == "analyze":
+        processor.analyze()
+    elif args.command == "report":
+        processor.report()
+    elif args.command == "price":
+        processor.price(list(zip(args.lookups[::2], args.lookups[1::2])))
+    else:
+        processor.watch(debounce=args.debounce, poll_interval=args.poll_interval)
     
-    # Check for command-line arguments
-    receipts_dir = None
-    if len(sys.argv) > 1:
-        receipts_dir = sys.argv[1]
-        print(f"Using receipts directory: {receipts_dir}")
+    if ledger:
+        ledger.close()
     
-    processor = InvoiceProcessor(receipts_dir=receipts_dir)
-    processor.run()
\ No newline at end of file
+    if metrics:
+        metrics.print_report()
+        metrics.save(args.metrics)